@@ -0,0 +1,32 @@
+"""export updated_at indexes
+
+Revision ID: 0a7e4b2c9d15
+Revises: f3c8d1a6e402
+Create Date: 2026-10-18 15:48:03.127904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7e4b2c9d15'
+down_revision: Union[str, Sequence[str], None] = 'f3c8d1a6e402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_posts_updated_at_id', 'posts', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_users_updated_at_id', 'users', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_comments_updated_at_id', 'comments', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_updated_at_id', table_name='comments')
+    op.drop_index('ix_users_updated_at_id', table_name='users')
+    op.drop_index('ix_posts_updated_at_id', table_name='posts')
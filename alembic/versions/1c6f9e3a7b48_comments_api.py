@@ -0,0 +1,73 @@
+"""comments api: uuid ids, keyset index and post comment counts
+
+Revision ID: 1c6f9e3a7b48
+Revises: 0a7e4b2c9d15
+Create Date: 2026-10-18 16:25:39.551208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c6f9e3a7b48'
+down_revision: Union[str, Sequence[str], None] = '0a7e4b2c9d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COMMENTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION comments_maintain_post_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET comment_count = comment_count - 1 WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+COMMENTS_TRIGGER = """
+CREATE TRIGGER comments_maintain_post_count
+AFTER INSERT OR DELETE ON comments
+FOR EACH ROW EXECUTE FUNCTION comments_maintain_post_count()
+"""
+
+BACKFILL = """
+UPDATE posts p SET comment_count = s.total
+FROM (SELECT post_id, count(*) AS total FROM comments GROUP BY post_id) s
+WHERE p.id = s.post_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    #The initial migration created comments.id as an integer while the model uses UUIDs.
+    #Comments were never exposed, so existing ids are simply regenerated.
+    op.execute("ALTER TABLE comments ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER TABLE comments ALTER COLUMN id TYPE uuid USING gen_random_uuid()")
+    op.execute("DROP SEQUENCE IF EXISTS comments_id_seq")
+
+    op.create_index('ix_comments_post_id_created_at_id', 'comments', ['post_id', 'created_at', 'id'], unique=False)
+    op.add_column('posts', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    for statement in (BACKFILL, COMMENTS_FUNCTION, COMMENTS_TRIGGER):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS comments_maintain_post_count ON comments")
+    op.execute("DROP FUNCTION IF EXISTS comments_maintain_post_count()")
+    op.drop_column('posts', 'comment_count')
+    op.drop_index('ix_comments_post_id_created_at_id', table_name='comments')
+
+    #Back to the serial integer ids of e1b718ed1b10; uuids cannot be cast, so ids are renumbered
+    op.execute("CREATE SEQUENCE comments_id_seq AS integer")
+    op.execute("ALTER TABLE comments ALTER COLUMN id TYPE integer USING nextval('comments_id_seq')")
+    op.execute("ALTER TABLE comments ALTER COLUMN id SET DEFAULT nextval('comments_id_seq')")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
@@ -0,0 +1,33 @@
+"""posts keyset pagination index
+
+Revision ID: 3f9a1c7d2e54
+Revises: 6d9ecbed9211
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2e54'
+down_revision: Union[str, Sequence[str], None] = '6d9ecbed9211'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_posts_status_created_at_id',
+        'posts',
+        ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_status_created_at_id', table_name='posts')
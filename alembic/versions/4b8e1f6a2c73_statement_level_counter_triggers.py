@@ -0,0 +1,181 @@
+"""statement-level post counter triggers
+
+Revision ID: 4b8e1f6a2c73
+Revises: 1c6f9e3a7b48
+Create Date: 2026-10-18 20:12:44.081736
+
+"""
+import importlib.util
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e1f6a2c73'
+down_revision: Union[str, Sequence[str], None] = '1c6f9e3a7b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+#Row triggers issued one counter UPDATE per imported post and per post_tags row.
+#These run once per statement over the transition tables and apply one
+#aggregated delta per category or tag, so a COPY of 10k posts costs a handful of UPDATEs.
+POSTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION posts_maintain_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE categories c
+        SET total_post_count = c.total_post_count + d.total,
+            published_post_count = c.published_post_count + d.published
+        FROM (
+            SELECT category_id, count(*) AS total, count(*) FILTER (WHERE status = 'published') AS published
+            FROM new_rows GROUP BY category_id
+        ) d
+        WHERE c.id = d.category_id;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE categories c
+        SET total_post_count = c.total_post_count - d.total,
+            published_post_count = c.published_post_count - d.published
+        FROM (
+            SELECT category_id, count(*) AS total, count(*) FILTER (WHERE status = 'published') AS published
+            FROM old_rows GROUP BY category_id
+        ) d
+        WHERE c.id = d.category_id;
+
+    ELSE
+        UPDATE categories c
+        SET total_post_count = c.total_post_count + d.total,
+            published_post_count = c.published_post_count + d.published
+        FROM (
+            SELECT category_id, sum(total) AS total, sum(published) AS published
+            FROM (
+                SELECT n.category_id, 1 AS total, (n.status = 'published')::int AS published
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                UNION ALL
+                SELECT o.category_id, -1, -(o.status = 'published')::int
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+            ) changes
+            GROUP BY category_id
+        ) d
+        WHERE c.id = d.category_id AND (d.total <> 0 OR d.published <> 0);
+
+        UPDATE tags t
+        SET published_post_count = t.published_post_count + d.published
+        FROM (
+            SELECT pt.tag_id, sum((n.status = 'published')::int - (o.status = 'published')::int) AS published
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            JOIN post_tags pt ON pt.post_id = n.id
+            WHERE (n.status = 'published') <> (o.status = 'published')
+            GROUP BY pt.tag_id
+        ) d
+        WHERE t.id = d.tag_id AND d.published <> 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+#Transition tables rule out UPDATE OF column lists, so updates are filtered inside the function
+POSTS_TRIGGERS = (
+    """
+    CREATE TRIGGER posts_maintain_counters_insert
+    AFTER INSERT ON posts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_maintain_counters()
+    """,
+    """
+    CREATE TRIGGER posts_maintain_counters_update
+    AFTER UPDATE ON posts REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_maintain_counters()
+    """,
+    """
+    CREATE TRIGGER posts_maintain_counters_delete
+    AFTER DELETE ON posts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_maintain_counters()
+    """,
+)
+
+#post_tags rows must be removed before their post (no cascade), so the post is still visible here
+POST_TAGS_FUNCTION = """
+CREATE OR REPLACE FUNCTION post_tags_maintain_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE tags t
+        SET total_post_count = t.total_post_count + d.total,
+            published_post_count = t.published_post_count + d.published
+        FROM (
+            SELECT l.tag_id, count(*) AS total, count(*) FILTER (WHERE p.status = 'published') AS published
+            FROM new_rows l LEFT JOIN posts p ON p.id = l.post_id
+            GROUP BY l.tag_id
+        ) d
+        WHERE t.id = d.tag_id;
+
+    ELSE
+        UPDATE tags t
+        SET total_post_count = t.total_post_count - d.total,
+            published_post_count = t.published_post_count - d.published
+        FROM (
+            SELECT l.tag_id, count(*) AS total, count(*) FILTER (WHERE p.status = 'published') AS published
+            FROM old_rows l LEFT JOIN posts p ON p.id = l.post_id
+            GROUP BY l.tag_id
+        ) d
+        WHERE t.id = d.tag_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+POST_TAGS_TRIGGERS = (
+    """
+    CREATE TRIGGER post_tags_maintain_counters_insert
+    AFTER INSERT ON post_tags REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION post_tags_maintain_counters()
+    """,
+    """
+    CREATE TRIGGER post_tags_maintain_counters_delete
+    AFTER DELETE ON post_tags REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION post_tags_maintain_counters()
+    """,
+)
+
+STATEMENT_TRIGGERS = {
+    'posts': ('posts_maintain_counters_insert', 'posts_maintain_counters_update', 'posts_maintain_counters_delete'),
+    'post_tags': ('post_tags_maintain_counters_insert', 'post_tags_maintain_counters_delete'),
+}
+
+
+def row_level_revision():
+    """e5a9c2f47b13 holds the row-level definitions restored on downgrade"""
+    path = Path(__file__).with_name('e5a9c2f47b13_post_counters.py')
+    spec = importlib.util.spec_from_file_location('e5a9c2f47b13_post_counters', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS posts_maintain_counters ON posts")
+    op.execute("DROP TRIGGER IF EXISTS post_tags_maintain_counters ON post_tags")
+
+    #One statement per execute: asyncpg prepares each of them
+    for statement in (POSTS_FUNCTION, *POSTS_TRIGGERS, POST_TAGS_FUNCTION, *POST_TAGS_TRIGGERS):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, triggers in STATEMENT_TRIGGERS.items():
+        for trigger in triggers:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+
+    previous = row_level_revision()
+    for statement in (previous.POSTS_FUNCTION, previous.POSTS_TRIGGER, previous.POST_TAGS_FUNCTION, previous.POST_TAGS_TRIGGER):
+        op.execute(statement)
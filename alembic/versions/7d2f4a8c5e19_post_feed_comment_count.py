@@ -0,0 +1,77 @@
+"""post_feed comment counts
+
+Revision ID: 7d2f4a8c5e19
+Revises: 4b8e1f6a2c73
+Create Date: 2026-10-18 22:41:07.315602
+
+comment_count moves out of the pre-rendered payload into its own column,
+bumped by the comments trigger and merged into the JSON at read time, so a
+comment no longer re-renders the feed row.
+"""
+import importlib.util
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f4a8c5e19'
+down_revision: Union[str, Sequence[str], None] = '4b8e1f6a2c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COMMENTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION comments_maintain_post_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+        UPDATE post_feed SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET comment_count = comment_count - 1 WHERE id = OLD.post_id;
+        UPDATE post_feed SET comment_count = comment_count - 1 WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+#Payloads are compact pydantic JSON where comment_count is never the first key
+BACKFILL = """
+UPDATE post_feed f
+SET comment_count = p.comment_count,
+    payload = regexp_replace(f.payload, ',"comment_count":-?[0-9]+', '')
+FROM posts p
+WHERE p.id = f.id
+"""
+
+RESTORE_PAYLOADS = """
+UPDATE post_feed
+SET payload = left(payload, -1) || ',"comment_count":' || comment_count || '}'
+"""
+
+
+def comments_revision():
+    """1c6f9e3a7b48 holds the function restored on downgrade"""
+    path = Path(__file__).with_name('1c6f9e3a7b48_comments_api.py')
+    spec = importlib.util.spec_from_file_location('1c6f9e3a7b48_comments_api', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('post_feed', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    for statement in (BACKFILL, COMMENTS_FUNCTION):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(comments_revision().COMMENTS_FUNCTION)
+    op.execute(RESTORE_PAYLOADS)
+    op.drop_column('post_feed', 'comment_count')
@@ -0,0 +1,33 @@
+"""image variants
+
+Revision ID: c4e7a2b9d318
+Revises: 8b2d4e6f1a90
+Create Date: 2026-10-18 11:48:05.617240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a2b9d318'
+down_revision: Union[str, Sequence[str], None] = '8b2d4e6f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('posts', 'categories', 'users'):
+        op.add_column(table, sa.Column('image_variants', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+        op.add_column(table, sa.Column('image_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('users', 'categories', 'posts'):
+        op.drop_column(table, 'image_hash')
+        op.drop_column(table, 'image_variants')
@@ -0,0 +1,41 @@
+"""media objects
+
+Revision ID: d81f3a5c6b27
+Revises: c4e7a2b9d318
+Create Date: 2026-10-18 12:31:44.902153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f3a5c6b27'
+down_revision: Union[str, Sequence[str], None] = 'c4e7a2b9d318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_objects',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_media_objects_hash'), 'media_objects', ['hash'], unique=False)
+    op.create_index('ix_media_objects_unreferenced', 'media_objects', ['updated_at'], unique=False, postgresql_where=sa.text('ref_count <= 0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_media_objects_unreferenced', table_name='media_objects', postgresql_where=sa.text('ref_count <= 0'))
+    op.drop_index(op.f('ix_media_objects_hash'), table_name='media_objects')
+    op.drop_table('media_objects')
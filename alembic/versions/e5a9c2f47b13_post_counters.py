@@ -0,0 +1,152 @@
+"""post counters on categories and tags
+
+Revision ID: e5a9c2f47b13
+Revises: d81f3a5c6b27
+Create Date: 2026-10-18 14:02:17.318640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c2f47b13'
+down_revision: Union[str, Sequence[str], None] = 'd81f3a5c6b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+#Counters are kept by triggers so ORM writes, bulk COPY imports and manual SQL all stay in sync
+POSTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION posts_maintain_counters() RETURNS trigger AS $$
+DECLARE
+    old_published int := 0;
+    new_published int := 0;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        old_published := (OLD.status = 'published')::int;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        new_published := (NEW.status = 'published')::int;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        UPDATE categories
+        SET total_post_count = total_post_count + 1,
+            published_post_count = published_post_count + new_published
+        WHERE id = NEW.category_id;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE categories
+        SET total_post_count = total_post_count - 1,
+            published_post_count = published_post_count - old_published
+        WHERE id = OLD.category_id;
+
+    ELSE
+        IF NEW.category_id IS DISTINCT FROM OLD.category_id THEN
+            UPDATE categories
+            SET total_post_count = total_post_count - 1,
+                published_post_count = published_post_count - old_published
+            WHERE id = OLD.category_id;
+            UPDATE categories
+            SET total_post_count = total_post_count + 1,
+                published_post_count = published_post_count + new_published
+            WHERE id = NEW.category_id;
+        ELSIF new_published <> old_published THEN
+            UPDATE categories
+            SET published_post_count = published_post_count + new_published - old_published
+            WHERE id = NEW.category_id;
+        END IF;
+
+        IF new_published <> old_published THEN
+            UPDATE tags
+            SET published_post_count = published_post_count + new_published - old_published
+            WHERE id IN (SELECT tag_id FROM post_tags WHERE post_id = NEW.id);
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+POSTS_TRIGGER = """
+CREATE TRIGGER posts_maintain_counters
+AFTER INSERT OR DELETE OR UPDATE OF status, category_id ON posts
+FOR EACH ROW EXECUTE FUNCTION posts_maintain_counters()
+"""
+
+#post_tags rows must be removed before their post (no cascade), so the post is still visible here
+POST_TAGS_FUNCTION = """
+CREATE OR REPLACE FUNCTION post_tags_maintain_counters() RETURNS trigger AS $$
+DECLARE
+    delta int := CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END;
+    link_post_id uuid := CASE WHEN TG_OP = 'INSERT' THEN NEW.post_id ELSE OLD.post_id END;
+    link_tag_id uuid := CASE WHEN TG_OP = 'INSERT' THEN NEW.tag_id ELSE OLD.tag_id END;
+    published int;
+BEGIN
+    SELECT (status = 'published')::int INTO published FROM posts WHERE id = link_post_id;
+
+    UPDATE tags
+    SET total_post_count = total_post_count + delta,
+        published_post_count = published_post_count + delta * coalesce(published, 0)
+    WHERE id = link_tag_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+POST_TAGS_TRIGGER = """
+CREATE TRIGGER post_tags_maintain_counters
+AFTER INSERT OR DELETE ON post_tags
+FOR EACH ROW EXECUTE FUNCTION post_tags_maintain_counters()
+"""
+
+BACKFILL_CATEGORIES = """
+UPDATE categories c SET
+    total_post_count = s.total,
+    published_post_count = s.published
+FROM (
+    SELECT category_id, count(*) AS total, count(*) FILTER (WHERE status = 'published') AS published
+    FROM posts GROUP BY category_id
+) s
+WHERE c.id = s.category_id
+"""
+
+BACKFILL_TAGS = """
+UPDATE tags t SET
+    total_post_count = s.total,
+    published_post_count = s.published
+FROM (
+    SELECT pt.tag_id, count(*) AS total, count(*) FILTER (WHERE p.status = 'published') AS published
+    FROM post_tags pt JOIN posts p ON p.id = pt.post_id
+    GROUP BY pt.tag_id
+) s
+WHERE t.id = s.tag_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('categories', 'tags'):
+        op.add_column(table, sa.Column('published_post_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('total_post_count', sa.Integer(), server_default='0', nullable=False))
+
+    #One statement per execute: asyncpg prepares each of them
+    for statement in (BACKFILL_CATEGORIES, BACKFILL_TAGS, POSTS_FUNCTION, POSTS_TRIGGER, POST_TAGS_FUNCTION, POST_TAGS_TRIGGER):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS post_tags_maintain_counters ON post_tags")
+    op.execute("DROP FUNCTION IF EXISTS post_tags_maintain_counters()")
+    op.execute("DROP TRIGGER IF EXISTS posts_maintain_counters ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_maintain_counters()")
+
+    for table in ('tags', 'categories'):
+        op.drop_column(table, 'total_post_count')
+        op.drop_column(table, 'published_post_count')
@@ -0,0 +1,39 @@
+"""post feed read model
+
+Revision ID: f3c8d1a6e402
+Revises: e5a9c2f47b13
+Create Date: 2026-10-18 15:10:52.640381
+
+Rows hold PostResponse JSON rendered by the app, so they are not backfilled
+here. Run `python -m scripts.rebuild_post_feed` after upgrading.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8d1a6e402'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c2f47b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('post_feed',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_post_feed_created_at_id', 'post_feed', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_feed_created_at_id', table_name='post_feed')
+    op.drop_table('post_feed')
@@ -1,5 +1,5 @@
 from pydantic_settings import SettingsConfigDict,BaseSettings
-from typing import List
+from typing import Dict,List,Optional
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -13,17 +13,74 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS:int
     model_config=SettingsConfigDict(env_file=".env",case_sensitive=True)
     
+    #Database connection pool
+    DATABASE_REPLICA_URL:Optional[str] = None
+    DB_ECHO:bool = False
+    DB_POOL_SIZE:int = 10
+    DB_MAX_OVERFLOW:int = 20
+    DB_POOL_TIMEOUT:int = 30
+    DB_POOL_PRE_PING:bool = True
+    DB_POOL_RECYCLE:int = 1800
+    DB_STATEMENT_CACHE_SIZE:int = 100
+    DB_QUERY_CACHE_SIZE:int = 500
+    
+    #Startup warm-up
+    WARM_DB_CONNECTIONS:int = 5
+    WARM_REDIS_CONNECTIONS:int = 5
+    WARM_CACHES_ON_STARTUP:bool = True
+    SEED_ADMIN_ON_STARTUP:bool = True
+    
+    #SQL profiling
+    SQL_PROFILING_ENABLED:bool = False
+    SLOW_QUERY_MS:float = 200
+    N_PLUS_ONE_THRESHOLD:int = 5
+    
+    #Prometheus metrics
+    METRICS_ENABLED:bool = True
+    METRICS_PATH:str = "/metrics"
+    
+    #Render JSON responses with orjson instead of the stdlib encoder
+    ORJSON_RESPONSES:bool = False
+    
     #Media settings
     MEDIA_ROOT:Path = BASE_DIR/"uploads"
     MEDIA_URL:str = "/uploads"
+    MEDIA_CACHE_MAX_AGE:int = 3600
+    MEDIA_ACCEL_REDIRECT_PREFIX:Optional[str] = None
     BASE_URL:str = "http://localhost:8000"
     
+    #Image uploads
+    MAX_IMAGE_UPLOAD_BYTES:int = 20 * 1024 * 1024
+    IMAGE_FORMAT:str = "webp"
+    IMAGE_QUALITY:int = 82
+    IMAGE_WORKERS:int = 2
+    
+    #Unreferenced media clean-up
+    MEDIA_GC_INTERVAL_SECONDS:int = 3600
+    MEDIA_GC_GRACE_SECONDS:int = 3600
+    MEDIA_GC_BATCH_SIZE:int = 500
+    
     #Mail settings
     MAIL_SERVER: str
     MAIL_PORT: int
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
+    MAIL_STARTTLS: bool = True
+    MAIL_TIMEOUT_SECONDS: int = 30
+    EMAIL_TEMPLATE_CACHE_DIR: Optional[Path] = None
+    
+    #Email outbox worker
+    EMAIL_WORKER_IN_PROCESS: bool = True
+    #Defaults to hostname:pid; only set it for a single fixed worker process
+    EMAIL_WORKER_NAME: Optional[str] = None
+    #Raised to at least 4 * MAIL_TIMEOUT_SECONDS
+    EMAIL_WORKER_HEARTBEAT_SECONDS: int = 120
+    EMAIL_WORKER_CONCURRENCY: int = 2
+    EMAIL_BATCH_SIZE: int = 20
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: int = 5
+    EMAIL_RETRY_MAX_SECONDS: int = 900
     
     #ADMIN
     ADMIN_NAME:str
@@ -33,6 +90,52 @@ class Settings(BaseSettings):
     
     #REDIS
     REDIS_URL:str
+    REDIS_MAX_CONNECTIONS:int = 50
+    REDIS_POOL_TIMEOUT:float = 5
+    REDIS_SOCKET_TIMEOUT:float = 5
+    REDIS_CONNECT_TIMEOUT:float = 2
+    REDIS_HEALTH_CHECK_INTERVAL:int = 30
+    REDIS_RETRY_ON_TIMEOUT:bool = True
+    
+    #Bulk import
+    BULK_BATCH_SIZE:int = 1000
+    BULK_COPY_THRESHOLD:int = 500
+    
+    #NDJSON export
+    EXPORT_BATCH_SIZE:int = 1000
+    EXPORT_GZIP_LEVEL:int = 6
+    #updated_since is moved back by this much: updated_at is stamped by app hosts at flush
+    #time, so a row can commit after a pull started with an earlier timestamp
+    EXPORT_OVERLAP_SECONDS:int = 300
+    
+    #Password reset OTP
+    OTP_TTL_SECONDS:int = 600
+    OTP_MAX_ATTEMPTS:int = 5
+    OTP_LOCKOUT_SECONDS:int = 900
+    RESET_TOKEN_TTL_SECONDS:int = 900
+    
+    #Rate limits per route as "requests/seconds" token buckets, keyed by ip, email and global
+    RATE_LIMIT_ENABLED:bool = True
+    RATE_LIMIT_TRUST_FORWARDED:bool = False
+    RATE_LIMITS:Dict[str,Dict[str,str]] = {
+        "login":{"ip":"20/60","email":"5/60","global":"100/1"},
+        "password_reset":{"ip":"5/300","email":"3/900","global":"20/1"},
+        "otp":{"ip":"10/300","email":"5/600","global":"50/1"},
+        "reset_token":{"ip":"10/300","email":"5/600","global":"50/1"},
+    }
+    
+    #Cache settings
+    POST_CACHE_TTL:int = 300
+    
+    #Auth principal cache
+    AUTH_CACHE_ENABLED:bool = True
+    AUTH_CACHE_TTL:int = 300
+    AUTH_LOCAL_CACHE_TTL:int = 5
+    AUTH_LOCAL_CACHE_SIZE:int = 10000
+    
+    #Password hashing pool
+    PASSWORD_HASH_WORKERS:int = 4
+    PASSWORD_HASH_QUEUE_SIZE:int = 32
     
 
     
@@ -5,8 +5,8 @@ from sqlalchemy.exc import IntegrityError,SQLAlchemyError
 from fastapi import HTTPException,status
 from typing import List
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from utils.storage import save_upload_files
+from utils.storage import save_image_upload
+from utils.media_store import release_references,image_urls
 from uuid import UUID
 from schemas.user_schemas import Roles
 
@@ -21,7 +21,6 @@ async def create_category(db:AsyncSession,category:CategoryCreate) -> CategoryRe
     db.add(new_category)
     try:
         await db.commit()
-        await db.refresh(new_category)
         
     except IntegrityError:
         await db.rollback()
@@ -75,7 +74,6 @@ async def update_category(db:AsyncSession,category_id:int,category_data:Category
             setattr(category, field, value)
 
         await db.commit()
-        await db.refresh(category)
         
         return category
         
@@ -106,9 +104,14 @@ async def upload_image(db:AsyncSession,category_id:int,file):
             detail="Category not found"
         )
         
-    category.image_url = await save_upload_files(file,subdir="categories")
+    old_urls = image_urls(category)
+    image_url,variants,image_hash = await save_image_upload(db,file)
+    await release_references(db,old_urls)
+    
+    category.image_url = image_url
+    category.image_variants = variants
+    category.image_hash = image_hash
     await db.commit()
-    await db.refresh(category)
     return category
 
 
@@ -126,11 +129,7 @@ async def delete_category(
             detail="Not authorized to delete this category"
         )
         
-    result = await db.execute(
-        select(Category)
-        .options(selectinload(Category.posts))
-        .where(Category.id == category_id)      
-    )
+    result = await db.execute(select(Category).where(Category.id == category_id))
     cat = result.scalar_one_or_none()
     
     if not cat:
@@ -139,13 +138,14 @@ async def delete_category(
             detail="Category not found"
         )
         
-    if cat.posts: 
+    if cat.total_post_count > 0: 
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete category with associated posts"
         )
         
     
+    await release_references(db,image_urls(cat))
     await db.delete(cat)
     await db.commit()
 
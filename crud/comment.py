@@ -0,0 +1,118 @@
+from models.models import Comment,Post,User
+from schemas.comment_schemas import CommentCreate,CommentResponse,CommentPage
+from schemas.posts_schemas import PostStatusEnum
+from schemas.user_schemas import Roles
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import exists,tuple_
+from fastapi import HTTPException,status
+from uuid import UUID
+from utils.pagination import decode_cursor,paginate_rows
+from utils.cache import invalidate_post
+
+
+#Comments in conversation order with the author's username joined in
+def comments_query(post_id:UUID):
+    return (
+        select(
+            Comment.id,
+            Comment.post_id,
+            Comment.user_id,
+            User.username,
+            Comment.message,
+            Comment.created_at
+        )
+        .join(User,User.id == Comment.user_id)
+        .join(Post,Post.id == Comment.post_id)
+        .where(Comment.post_id == post_id,Post.status == PostStatusEnum.published)
+    )
+
+
+async def get_comments(
+    db:AsyncSession,
+    post_id:UUID,
+    limit:int,
+    cursor:str | None = None
+) -> CommentPage:
+    """
+    Oldest first, keyset paginated on (post_id, created_at, id).
+    Authors come from the same query, so a page costs one round trip.
+    """
+    query = comments_query(post_id)
+    if cursor:
+        created_at,comment_id = decode_cursor(cursor)
+        query = query.where(tuple_(Comment.created_at,Comment.id) > tuple_(created_at,comment_id))
+
+    result = await db.execute(query.order_by(Comment.created_at,Comment.id).limit(limit + 1))
+    rows,next_cursor = paginate_rows(result.all(),limit)
+    return CommentPage(
+        items=[CommentResponse.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
+async def create_comment(
+    db:AsyncSession,
+    post_id:UUID,
+    comment_data:CommentCreate,
+    current_user:User
+) -> CommentResponse:
+    #Username and post visibility in one query
+    username = await db.scalar(
+        select(User.username).where(
+            User.id == current_user.id,
+            exists().where(Post.id == post_id,Post.status == PostStatusEnum.published)
+        )
+    )
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
+
+    comment = Comment(
+        post_id = post_id,
+        user_id = current_user.id,
+        message = comment_data.message
+    )
+    db.add(comment)
+    #The comments trigger bumps comment_count on posts and post_feed
+    await db.commit()
+
+    #Listing pages embed the count too
+    await invalidate_post(post_id)
+
+    return CommentResponse(
+        id=comment.id,
+        post_id=comment.post_id,
+        user_id=comment.user_id,
+        username=username,
+        message=comment.message,
+        created_at=comment.created_at
+    )
+
+
+async def delete_comment(
+    db:AsyncSession,
+    post_id:UUID,
+    comment_id:UUID,
+    current_user:User
+):
+    """Only the comment's author or an admin can delete it"""
+    comment = await db.get(Comment,comment_id)
+    if not comment or comment.post_id != post_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment not found"
+        )
+
+    if current_user.role != Roles.admin and comment.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this comment"
+        )
+
+    await db.delete(comment)
+    await db.commit()
+
+    await invalidate_post(post_id)
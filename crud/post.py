@@ -1,17 +1,26 @@
-from models.models import Post,User
-from schemas.posts_schemas import PostCreate,PostResponse,PostUpdate,PostStatusEnum
+from models.models import Post,User,Category,post_tags
+from schemas.posts_schemas import PostCreate,PostResponse,PostUpdate,PostStatusEnum,PostSearchHit,BulkPostResult,BulkPostError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError,SQLAlchemyError
 from fastapi import HTTPException,status, UploadFile
-from typing import List
-from utils.storage import save_upload_files
+from utils.storage import save_image_upload
+from utils.media_store import release_references,image_urls
 from sqlalchemy.future import select
+from sqlalchemy import func,tuple_,literal,Float,insert
+from pydantic import ValidationError
+from datetime import datetime
+from uuid import uuid4
+from config import settings
+from asyncpg import PostgresError
 from sqlalchemy.orm import selectinload
 from uuid import UUID
 from schemas.user_schemas import Roles
-from schemas.tag_schemas import TagResponse
 from models.models import Tag
+from utils.pagination import apply_keyset,encode_rank_cursor,decode_rank_cursor
+from utils.cache import invalidate_post,invalidate_listings
+from crud.post_feed import sync_feed_entry,refresh_feed_entries
 import os
+import html
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,9 +37,9 @@ async def create_post(db:AsyncSession,current_user:User,image_url: str,post_data
         tags = result.scalars().all()
         
     if current_user.role == Roles.admin:
-        status = PostStatusEnum.published
+        post_status = PostStatusEnum.published
     else:
-        status = PostStatusEnum.pending_review
+        post_status = PostStatusEnum.pending_review
     
     #Create post instance
     new_post = Post(
@@ -40,20 +49,21 @@ async def create_post(db:AsyncSession,current_user:User,image_url: str,post_data
         category_id = post_data.category_id,
         author_id = current_user.id,
         image_url = image_url,
-        status = status
+        status = post_status
     )
     new_post.tags = tags
     db.add(new_post)
     try:
+        await db.flush()
+        await sync_feed_entry(db,new_post)
         await db.commit()
-        await db.refresh(new_post)
-        await db.refresh(new_post, attribute_names=["tags"])
-
         
     except IntegrityError as e:
         await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail=f"Invalid data or foreign key constraint failed: {e}")
     
+    await invalidate_post(new_post.id,listings=new_post.status == PostStatusEnum.published)
+    
     return new_post
 
 
@@ -99,7 +109,7 @@ async def delete_post(
     post_id:UUID,
     current_user:User
 ) ->Post:
-    post = await get_single_post(db,post_id)
+    post = await get_single_post(db,post_id,current_user)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,11 +123,14 @@ async def delete_post(
             detail="Not authorized to delete this post"
         )
         
+    was_published = post.status == PostStatusEnum.published
     post.status = PostStatusEnum.archived
     
     db.add(post)
+    await sync_feed_entry(db,post)
     await db.commit()
-    await db.refresh(post)
+    
+    await invalidate_post(post.id,listings=was_published)
     
     return post
 
@@ -151,8 +164,11 @@ async def update_post(
     
     #Save in database
     db.add(new_post)
+    await db.flush()
+    await sync_feed_entry(db,new_post)
     await db.commit()
-    await db.refresh(new_post)
+    
+    await invalidate_post(new_post.id,listings=new_post.status == PostStatusEnum.published)
     
     return new_post
 
@@ -199,17 +215,25 @@ async def get_all_posts(
     db: AsyncSession,
     current_user: User,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: str | None = None
 ) -> list[Post]:
-
+    """
+    Offset mode by default. When `cursor` is given (empty for the first page)
+    keyset pagination is used and limit + 1 rows are returned.
+    """
     try:
-        query = (
-            select(Post)
-            .options(selectinload(Post.tags))
-            .order_by(Post.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
+        query = select(Post).options(selectinload(Post.tags))
+
+        if cursor is None:
+            query = (
+                query
+                .order_by(Post.created_at.desc(),Post.id.desc())
+                .offset(skip)
+                .limit(limit)
+            )
+        else:
+            query = apply_keyset(query,Post,cursor,limit)
 
         if current_user.role == Roles.admin:
             # Admin sees everything
@@ -255,55 +279,227 @@ async def update_post_image(
             detail="Not authorized to update this post image"
         )
         
-    if post.image_url:
-        relative_path = post.image_url.lstrip("/")
-
-        file_path = BASE_DIR / relative_path
-
-        if file_path.exists() and file_path.is_file():
-            file_path.unlink()
-            
-
-    image_url = await save_upload_files(file,subdir="posts")
+    old_urls = image_urls(post)
+    image_url,variants,image_hash = await save_image_upload(db,file)
+    await release_references(db,old_urls)
     
     post.image_url = image_url
+    post.image_variants = variants
+    post.image_hash = image_hash
     
+    await db.flush()
+    await sync_feed_entry(db,post)
     await db.commit()
-    await db.refresh(post)
+    
+    await invalidate_post(post.id,listings=post.status == PostStatusEnum.published)
 
     return post
     
-#Public posts 
-async def get_published_posts(db, skip, limit) -> List[Post]:
-    result = await db.execute(
-        select(Post)
+#Full-text search over published posts
+#ts_headline marks matches inside raw content, so it marks them with private-use
+#characters and the snippet is HTML-escaped before they become <mark> tags
+SNIPPET_START = "\ue000"
+SNIPPET_STOP = "\ue001"
+
+
+def render_snippet(headline:str) -> str:
+    return (
+        html.escape(headline)
+        .replace(SNIPPET_START,"<mark>")
+        .replace(SNIPPET_STOP,"</mark>")
+    )
+
+
+async def search_posts(
+    db:AsyncSession,
+    query_text:str,
+    limit:int = 20,
+    cursor:str | None = None,
+    category_id:UUID | None = None,
+    tag_id:UUID | None = None
+) -> tuple[list[PostSearchHit],str | None]:
+    """
+    Ranked search using the generated search_vector column.
+    Results are ordered by (rank DESC, id DESC) and paged with a rank cursor.
+    """
+    ts_query = func.websearch_to_tsquery("english",query_text)
+    rank = func.ts_rank_cd(Post.search_vector,ts_query)
+    snippet = func.ts_headline(
+        "english",
+        Post.content,
+        ts_query,
+        f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxFragments=2, MaxWords=30, MinWords=10"
+    )
+
+    query = (
+        select(Post,rank.label("rank"),snippet.label("snippet"))
         .options(selectinload(Post.tags))
-        .where(Post.status == PostStatusEnum.published)
-        .order_by(Post.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        .where(
+            Post.status == PostStatusEnum.published,
+            Post.search_vector.op("@@")(ts_query)
+        )
     )
-    return result.scalars().all()
 
+    if category_id:
+        query = query.where(Post.category_id == category_id)
+
+    if tag_id:
+        query = query.where(Post.tags.any(Tag.id == tag_id))
+
+    if cursor:
+        last_rank,last_id = decode_rank_cursor(cursor)
+        query = query.where(tuple_(rank,Post.id) < tuple_(literal(last_rank,Float),last_id))
+
+    query = query.order_by(rank.desc(),Post.id.desc()).limit(limit + 1)
 
-async def get_published_post(db: AsyncSession, post_id: UUID) -> Post:
     try:
-        result = await db.execute(
-            select(Post)
-            .options(selectinload(Post.tags))
-            .where(
-                Post.id == post_id,
-                Post.status == PostStatusEnum.published
-            )
-        )
-        post = result.scalar_one_or_none()
-        if not post:
-            raise HTTPException(404, "Post not found")
-        return post
-    
+        result = await db.execute(query)
+        rows = result.all()
+
     except SQLAlchemyError:
         raise HTTPException(
-            status_code=500,
-            detail="Internal server error"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search posts"
         )
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_rank_cursor(rows[-1].rank,rows[-1].Post.id)
+
+    hits = [
+        PostSearchHit(**dict(PostResponse.model_validate(row.Post)),rank=row.rank,snippet=render_snippet(row.snippet))
+        for row in rows
+    ]
+
+    return hits,next_cursor
+
+
+#Bulk import
+POST_COPY_COLUMNS = ["id","title","description","content","status","author_id","category_id","created_at","updated_at"]
+
+
+async def resolve_references(db:AsyncSession,category_ids:set,tag_ids:set) -> tuple[set,set]:
+    """Return the category and tag ids that exist, in a single round trip"""
+    if not category_ids and not tag_ids:
+        return set(),set()
+
+    query = (
+        select(literal("category").label("kind"),Category.id).where(Category.id.in_(category_ids))
+        .union_all(select(literal("tag").label("kind"),Tag.id).where(Tag.id.in_(tag_ids)))
+    )
+    result = await db.execute(query)
+
+    categories,tags = set(),set()
+    for kind,ref_id in result.all():
+        (categories if kind == "category" else tags).add(ref_id)
+    return categories,tags
+
+
+async def insert_post_rows(db:AsyncSession,post_rows:list[dict],tag_rows:list[dict]):
+    """
+    Write posts and post_tags. Large batches go through COPY, smaller ones
+    through multi-row INSERTs.
+    """
+    if len(post_rows) >= settings.BULK_COPY_THRESHOLD:
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        await driver.copy_records_to_table(
+            "posts",
+            records=[tuple(row[col] for col in POST_COPY_COLUMNS) for row in post_rows],
+            columns=POST_COPY_COLUMNS
+        )
+        if tag_rows:
+            await driver.copy_records_to_table(
+                "post_tags",
+                records=[(row["post_id"],row["tag_id"]) for row in tag_rows],
+                columns=["post_id","tag_id"]
+            )
+        return
+
+    await db.execute(insert(Post.__table__),post_rows)
+    if tag_rows:
+        await db.execute(insert(post_tags),tag_rows)
+
+
+async def bulk_create_posts(
+    db:AsyncSession,
+    current_user:User,
+    items:list[tuple[int,dict]]
+) -> BulkPostResult:
+    """
+    Validate and insert a batch of posts. Bad rows are reported by index and
+    skipped; the rest of the batch is still written.
+    """
+    report = BulkPostResult()
+    valid:list[tuple[int,PostCreate]] = []
+
+    for index,raw in items:
+        try:
+            valid.append((index,PostCreate.model_validate(raw)))
+        except ValidationError as e:
+            report.errors.append(BulkPostError(index=index,error=str(e.errors(include_url=False))))
+
+    categories,tags = await resolve_references(
+        db,
+        {post.category_id for _,post in valid},
+        {tag_id for _,post in valid for tag_id in post.tags or []}
+    )
+
+    post_status = PostStatusEnum.published if current_user.role == Roles.admin else PostStatusEnum.pending_review
+    now = datetime.utcnow()
+    pending = []
+
+    for index,post in valid:
+        if post.category_id not in categories:
+            report.errors.append(BulkPostError(index=index,error=f"Unknown category {post.category_id}"))
+            continue
+
+        missing_tags = set(post.tags or []) - tags
+        if missing_tags:
+            report.errors.append(BulkPostError(index=index,error=f"Unknown tags {sorted(map(str,missing_tags))}"))
+            continue
+
+        post_id = uuid4()
+        pending.append((index,{
+            "id":post_id,
+            "title":post.title,
+            "description":post.description,
+            "content":post.content,
+            "status":post_status.value,
+            "author_id":current_user.id,
+            "category_id":post.category_id,
+            "created_at":now,
+            "updated_at":now,
+        },[{"post_id":post_id,"tag_id":tag_id} for tag_id in set(post.tags or [])]))
+
+    created_ids = []
+    try:
+        async with db.begin_nested():
+            await insert_post_rows(db,[row for _,row,_ in pending],[tag for _,_,row_tags in pending for tag in row_tags])
+        created_ids = [row["id"] for _,row,_ in pending]
+
+    except (SQLAlchemyError,PostgresError):
+        #Isolate the failing rows so the rest of the batch still lands
+        for index,row,row_tags in pending:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(Post.__table__),[row])
+                    if row_tags:
+                        await db.execute(insert(post_tags),row_tags)
+                created_ids.append(row["id"])
+            except SQLAlchemyError as e:
+                report.errors.append(BulkPostError(index=index,error=str(e.orig if hasattr(e,"orig") else e)))
+
+    report.created = len(created_ids)
+    if created_ids and post_status == PostStatusEnum.published:
+        await refresh_feed_entries(db,created_ids)
+    await db.commit()
+
+    report.errors.sort(key=lambda error:error.index)
+    report.failed = len(report.errors)
+    if report.created and post_status == PostStatusEnum.published:
+        await invalidate_listings()
+
+    return report
@@ -0,0 +1,117 @@
+from models.models import Post,PostFeed
+from schemas.posts_schemas import PostResponse,PostStatusEnum
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy import Text,cast,delete,func
+from fastapi import HTTPException,status
+from datetime import datetime
+from uuid import UUID
+from utils.pagination import apply_keyset,paginate_rows
+import json
+
+FEED_REFRESH_CHUNK = 500
+
+#comment_count is kept out of the stored JSON so a comment only bumps a counter;
+#it is appended to the object here (payloads always end with "}")
+feed_payload = (
+    func.left(PostFeed.payload,-1)
+    .concat(',"comment_count":')
+    .concat(cast(PostFeed.comment_count,Text))
+    .concat("}")
+    .label("payload")
+)
+
+
+#Keep the feed row of one post in line with its current state
+async def sync_feed_entry(db:AsyncSession,post:Post):
+    """
+    Upsert the pre-serialized row when the post is published, drop it otherwise.
+    Call after a flush (so defaults and onupdate timestamps are set) and before
+    the commit, so the feed changes in the same transaction as the post.
+    `post.tags` must be loaded.
+    """
+    if post.status != PostStatusEnum.published:
+        await db.execute(delete(PostFeed).where(PostFeed.id == post.id))
+        return
+
+    payload = PostResponse.model_validate(post).model_dump_json(exclude={"comment_count"})
+    query = insert(PostFeed).values(
+        id=post.id,
+        created_at=post.created_at,
+        payload=payload,
+        #Read in the statement: the in-memory count can miss a comment committed since the post was loaded
+        comment_count=select(Post.comment_count).where(Post.id == post.id).scalar_subquery()
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[PostFeed.id],
+        set_={
+            "created_at":query.excluded.created_at,
+            "payload":query.excluded.payload,
+            "comment_count":query.excluded.comment_count,
+            "refreshed_at":datetime.utcnow(),
+        }
+    )
+    await db.execute(query)
+
+
+#Re-render the feed rows of many posts, e.g. after a bulk import
+async def refresh_feed_entries(db:AsyncSession,post_ids:list[UUID]):
+    for start in range(0,len(post_ids),FEED_REFRESH_CHUNK):
+        chunk = post_ids[start:start + FEED_REFRESH_CHUNK]
+        result = await db.execute(
+            select(Post)
+            .options(selectinload(Post.tags))
+            .where(Post.id.in_(chunk))
+            #Trigger-maintained columns may be stale on objects already in the session
+            .execution_options(populate_existing=True)
+        )
+        for post in result.scalars():
+            await sync_feed_entry(db,post)
+
+
+#Rebuild the whole feed, needed after BASE_URL or PostResponse changes
+async def rebuild_feed(db:AsyncSession) -> int:
+    await db.execute(delete(PostFeed))
+    result = await db.execute(select(Post.id).where(Post.status == PostStatusEnum.published))
+    post_ids = list(result.scalars())
+    await refresh_feed_entries(db,post_ids)
+    await db.commit()
+    return len(post_ids)
+
+
+async def get_feed_rows(db:AsyncSession,skip:int,limit:int,cursor:str | None = None):
+    """
+    (id, created_at, payload) rows, newest first. Offset mode by default;
+    with `cursor` keyset pagination is used and limit + 1 rows are returned.
+    """
+    query = select(PostFeed.id,PostFeed.created_at,feed_payload)
+
+    if cursor is None:
+        query = query.order_by(PostFeed.created_at.desc(),PostFeed.id.desc()).offset(skip).limit(limit)
+    else:
+        query = apply_keyset(query,PostFeed,cursor,limit)
+
+    result = await db.execute(query)
+    return result.all()
+
+
+async def get_feed_page(db:AsyncSession,skip:int,limit:int,cursor:str | None = None) -> str:
+    """
+    One public listing page as JSON, built by concatenating pre-serialized rows:
+    a list in offset mode, {"items", "next_cursor"} with a cursor
+    """
+    rows = await get_feed_rows(db,skip,limit,cursor)
+    if cursor is None:
+        return "[" + ",".join(row.payload for row in rows) + "]"
+
+    items,next_cursor = paginate_rows(rows,limit)
+    return '{"items":[' + ",".join(row.payload for row in items) + '],"next_cursor":' + json.dumps(next_cursor) + "}"
+
+
+async def get_feed_payload(db:AsyncSession,post_id:UUID) -> str:
+    payload = await db.scalar(select(feed_payload).where(PostFeed.id == post_id))
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Post not found")
+    return payload
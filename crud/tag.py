@@ -1,7 +1,7 @@
 from db import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.tag_schemas import TagCreate,TagResponse,TagUpdate
-from models.models import Tag, User,Post
+from models.models import Tag, User
 from typing import List
 from uuid import UUID
 from fastapi import HTTPException,status
@@ -27,7 +27,6 @@ async def create_tags(db:AsyncSession,tag_data:TagCreate,current_user:User) -> T
     
     try:
         await db.commit()
-        await db.refresh(new_tags)
         
     except IntegrityError:
         await db.rollback()
@@ -79,11 +78,7 @@ async def delete_tags(
     """Only admin can delete tags"""
     tag = await get_single_tag(db,tag_id)
     
-    posts_count = await db.execute(
-        select(Post).join(Post.tags).where(Tag.id == tag_id)
-    )
-    
-    if posts_count.scalars().first():
+    if tag.total_post_count > 0:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete tag: It is associated with posts"
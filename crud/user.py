@@ -7,8 +7,10 @@ from uuid import UUID
 import secrets
 from fastapi import HTTPException,status,UploadFile
 from sqlalchemy.exc import SQLAlchemyError
-from utils.security import hashed_password
-from utils.storage import save_upload_files
+from utils.security import hashed_password_async
+from utils.storage import save_image_upload
+from utils.media_store import release_references,image_urls
+from utils.principal_cache import bump_user_version
 
 #Function to create a new user
 async def  create_user(db:AsyncSession,user_data:UserCreate) -> User:
@@ -22,7 +24,7 @@ async def  create_user(db:AsyncSession,user_data:UserCreate) -> User:
         )
         
     #Hash the password
-    password_hashed = hashed_password(user_data.password)
+    password_hashed = await hashed_password_async(user_data.password)
     
     #Create new user
     new_user = User(
@@ -35,7 +37,6 @@ async def  create_user(db:AsyncSession,user_data:UserCreate) -> User:
     )
     db.add(new_user)
     await db.commit()
-    await db.refresh(new_user)
     
     return new_user
 
@@ -100,7 +101,7 @@ async def update_user(
     #Save changes
     db.add(user)
     await db.commit()
-    await db.refresh(user)
+    await bump_user_version(user.id)
 
     return user
 
@@ -129,7 +130,7 @@ async def update_user_attributes(
         user.email = user_update.email
         
     if user_update.password:
-        user.hash_password = hashed_password(user_update.password)
+        user.hash_password = await hashed_password_async(user_update.password)
     
     if user_update.phone is not None:
         user.phone = user_update.phone
@@ -173,7 +174,7 @@ async def delete_user(db: AsyncSession, user_id: UUID, current_user: User) -> bo
     
     db.add(user)
     await db.commit()
-    await db.refresh(user)
+    await bump_user_version(user.id)
     
     return True
 
@@ -188,14 +189,20 @@ async def update_user_image(
         raise HTTPException(status_code=400, detail="No file provided")
     
     try:
-        image_url = await save_upload_files(file,subdir="users")
+        old_urls = image_urls(user)
+        image_url,variants,image_hash = await save_image_upload(db,file)
+        await release_references(db,old_urls)
+        
         user.image_url = image_url
+        user.image_variants = variants
+        user.image_hash = image_hash
         
         db.add(user)
         await db.commit()
-        await db.refresh(user)
         
         return user
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -235,8 +242,7 @@ async def user_role_update(
     
     try:
         await db.commit()
-        await db.refresh(user)
-        
+        await bump_user_version(user.id)
             
     except Exception as e:
         await db.rollback()
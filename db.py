@@ -1,14 +1,40 @@
 from config import settings
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine,AsyncSession
 from sqlalchemy.orm import sessionmaker,declarative_base
+from utils.profiling import instrument_engine
+from utils.metrics import DB_POOL_TIMEOUTS,instrument_pools
 
 import logging
 logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo = True
-)
+
+def build_engine(url:str):
+    return create_async_engine(
+        url,
+        echo = settings.DB_ECHO,
+        pool_size = settings.DB_POOL_SIZE,
+        max_overflow = settings.DB_MAX_OVERFLOW,
+        pool_timeout = settings.DB_POOL_TIMEOUT,
+        pool_pre_ping = settings.DB_POOL_PRE_PING,
+        pool_recycle = settings.DB_POOL_RECYCLE,
+        query_cache_size = settings.DB_QUERY_CACHE_SIZE,
+        connect_args = {"prepared_statement_cache_size":settings.DB_STATEMENT_CACHE_SIZE}
+    )
+
+
+engine = build_engine(settings.DATABASE_URL)
+
+#Read-only traffic goes to the replica when one is configured
+replica_engine = build_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else engine
+
+if settings.SQL_PROFILING_ENABLED:
+    instrument_engine(engine)
+    if replica_engine is not engine:
+        instrument_engine(replica_engine)
+
+if settings.METRICS_ENABLED:
+    instrument_pools({"primary":engine} if replica_engine is engine else {"primary":engine,"replica":replica_engine})
 
 async_session = sessionmaker(
     engine,
@@ -16,6 +42,12 @@ async_session = sessionmaker(
     expire_on_commit=False
 )
 
+replica_session = sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 async def get_db() -> AsyncSession:
@@ -23,9 +55,27 @@ async def get_db() -> AsyncSession:
         try:
             yield session
             
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+            
         except Exception as e:
             logger.error(f"Session rollback due to exception: {e}", exc_info=True)
             await session.rollback()
             raise
 
-            
\ No newline at end of file
+
+async def get_read_db() -> AsyncSession:
+    """Session for read-only queries, served by the replica if configured"""
+    async with replica_session() as session:
+        try:
+            yield session
+            
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+            
+        except Exception as e:
+            logger.error(f"Read session error: {e}", exc_info=True)
+            await session.rollback()
+            raise
@@ -1,8 +1,8 @@
 import uuid
 from db import Base
-from sqlalchemy import Column,Integer,String,ForeignKey,DateTime,Table,Enum, Boolean
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column,Integer,String,ForeignKey,DateTime,Table,Enum, Boolean, Index, Computed, BigInteger, Text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime,timezone
 from schemas.user_schemas import Roles,AccountStatusEnum
 from schemas.posts_schemas import PostStatusEnum
@@ -17,6 +17,8 @@ class User(Base):
     hash_password = Column(String,nullable=False)
     role = Column(Enum(Roles),default=Roles.user)
     image_url = Column(String)
+    image_variants = Column(JSONB,nullable=True)
+    image_hash = Column(String(64),nullable=True)
     verified = Column(Boolean,default=False)
     status = Column(Enum(AccountStatusEnum), default = AccountStatusEnum.pending_verification)
     
@@ -39,9 +41,15 @@ class Category(Base):
     name = Column(String,nullable=False,unique=True)
     description = Column(String,nullable=True)
     image_url = Column(String,nullable=True)
+    image_variants = Column(JSONB,nullable=True)
+    image_hash = Column(String(64),nullable=True)
     
     posts = relationship('Post',back_populates='category')
     
+    #Maintained by the posts/post_tags triggers, never written by the app
+    published_post_count = Column(Integer,nullable=False,default=0,server_default="0")
+    total_post_count = Column(Integer,nullable=False,default=0,server_default="0")
+    
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -53,6 +61,8 @@ class Tag(Base):
     name = Column(String,nullable=False,unique=True)
     description = Column(String,nullable=True)
     posts = relationship('Post',secondary='post_tags',back_populates='tags')
+    published_post_count = Column(Integer,nullable=False,default=0,server_default="0")
+    total_post_count = Column(Integer,nullable=False,default=0,server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -66,10 +76,26 @@ class Post(Base):
     description = Column(String,nullable=True)
     content = Column(String,nullable=False)
     image_url = Column(String,nullable=True)
+    image_variants = Column(JSONB,nullable=True)
+    image_hash = Column(String(64),nullable=True)
     status = Column(Enum(PostStatusEnum),default=PostStatusEnum.draft)
     author_id = Column(UUID(as_uuid=True),ForeignKey('users.id'),nullable=False)
     category_id = Column(UUID(as_uuid=True),ForeignKey('categories.id'),nullable=False)
     
+    #Maintained by the comments trigger
+    comment_count = Column(Integer,nullable=False,default=0,server_default="0")
+    
+    #Full-text search document, maintained by Postgres
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'C')",
+            persisted=True
+        )
+    ))
+    
     #Relationship
     author = relationship('User',back_populates='posts')
     category = relationship('Category',back_populates='posts')
@@ -80,7 +106,21 @@ class Post(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    
+
+#Keyset pagination index for post listings
+Index(
+    "ix_posts_status_created_at_id",
+    Post.status,
+    Post.created_at.desc(),
+    Post.id.desc()
+)
+
+#Full-text search index
+Index("ix_posts_search_vector",Post.search_vector,postgresql_using="gin")
+
+#Ordered scans for the NDJSON export and updated_since pulls
+Index("ix_posts_updated_at_id",Post.updated_at,Post.id)
+Index("ix_users_updated_at_id",User.updated_at,User.id)
     
   
 class Comment(Base):
@@ -93,6 +133,12 @@ class Comment(Base):
     user = relationship('User',back_populates='comments')
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+Index("ix_comments_updated_at_id",Comment.updated_at,Comment.id)
+
+#Keyset pagination of a post's comments
+Index("ix_comments_post_id_created_at_id",Comment.post_id,Comment.created_at,Comment.id)
     
     
 post_tags = Table(
@@ -103,4 +149,40 @@ post_tags = Table(
     
 )
 
-        
\ No newline at end of file
+
+#Content-addressed media blobs shared by users, categories and posts
+class MediaObject(Base):
+    __tablename__ = "media_objects"
+    key = Column(String,primary_key=True)
+    hash = Column(String(64),nullable=False,index=True)
+    url = Column(String,nullable=False)
+    size = Column(BigInteger,nullable=False,default=0)
+    ref_count = Column(Integer,nullable=False,default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+#Lets the collector find unreferenced blobs without scanning the table
+Index(
+    "ix_media_objects_unreferenced",
+    MediaObject.updated_at,
+    postgresql_where=MediaObject.ref_count <= 0
+)
+
+
+#Published posts pre-serialized as PostResponse JSON for the public listing
+class PostFeed(Base):
+    __tablename__ = "post_feed"
+    id = Column(UUID(as_uuid=True),ForeignKey('posts.id',ondelete="CASCADE"),primary_key=True)
+    created_at = Column(DateTime,nullable=False)
+    payload = Column(Text,nullable=False)
+    #Bumped by the comments trigger and merged into payload at read time
+    comment_count = Column(Integer,nullable=False,default=0,server_default="0")
+    refreshed_at = Column(DateTime,default=datetime.utcnow,onupdate=datetime.utcnow)
+
+
+Index(
+    "ix_post_feed_created_at_id",
+    PostFeed.created_at.desc(),
+    PostFeed.id.desc()
+)
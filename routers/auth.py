@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException,status
+from fastapi import APIRouter, Depends, HTTPException,status,Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
@@ -6,8 +6,9 @@ from schemas.user_schemas import AccountStatusEnum
 
 from db import get_db
 from crud.user import get_user_by_email
-from utils.security import verify_password, create_access_token
+from utils.security import verify_and_update_password_async, create_access_token
 from schemas.auth_schemas import Token
+from utils.rate_limit import check_rate_limit
 
 router = APIRouter(
     prefix="/auth",
@@ -15,9 +16,19 @@ router = APIRouter(
 )
 
 @router.post("/login",response_model=Token)
-async def login(form:OAuth2PasswordRequestForm = Depends(),db:AsyncSession = Depends(get_db)):
+async def login(request:Request,form:OAuth2PasswordRequestForm = Depends(),db:AsyncSession = Depends(get_db)):
+    await check_rate_limit(request,"login",form.username)
+    
     user = await get_user_by_email(db,email=form.username)
-    if not user or not verify_password(form.password,user.hash_password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials",
+            headers={"WWW-Authenticate":"Bearer"}
+        )
+        
+    valid,new_hash = await verify_and_update_password_async(form.password,user.hash_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -32,6 +43,10 @@ async def login(form:OAuth2PasswordRequestForm = Depends(),db:AsyncSession = Dep
             detail="Account is suspended. Please contact support."
         )
         
+    # Transparently upgrade hashes created with outdated argon2 parameters
+    if new_hash:
+        user.hash_password = new_hash
+        
     # Update last login time
     user.last_login = datetime.utcnow()
     db.add(user)
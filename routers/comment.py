@@ -0,0 +1,46 @@
+from db import get_db,get_read_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter,Depends,Query,status
+from typing import Optional
+from uuid import UUID
+from schemas.comment_schemas import CommentCreate,CommentResponse,CommentPage
+from schemas.auth_schemas import UserPrincipal
+from utils.auth import get_current_active_principal
+from crud.comment import get_comments,create_comment,delete_comment
+
+
+router = APIRouter(
+    prefix="/posts/{post_id}/comments",
+    tags=["comments"]
+)
+
+
+@router.get("/",response_model=CommentPage)
+async def list_comments(
+    post_id:UUID,
+    limit:int = Query(20,ge=1,le=100),
+    cursor:Optional[str] = None,
+    db:AsyncSession = Depends(get_read_db)
+):
+    """Comments of a published post, oldest first. Pass back `next_cursor` for the next page."""
+    return await get_comments(db,post_id,limit,cursor)
+
+
+@router.post("/",response_model=CommentResponse,status_code=status.HTTP_201_CREATED)
+async def add_comment(
+    post_id:UUID,
+    comment:CommentCreate,
+    db:AsyncSession = Depends(get_db),
+    current_user:UserPrincipal = Depends(get_current_active_principal)
+):
+    return await create_comment(db,post_id,comment,current_user)
+
+
+@router.delete("/{comment_id}",status_code=status.HTTP_204_NO_CONTENT)
+async def remove_comment(
+    post_id:UUID,
+    comment_id:UUID,
+    db:AsyncSession = Depends(get_db),
+    current_user:UserPrincipal = Depends(get_current_active_principal)
+):
+    await delete_comment(db,post_id,comment_id,current_user)
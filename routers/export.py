@@ -0,0 +1,58 @@
+from fastapi import APIRouter,Depends,HTTPException,status,Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime,timezone
+from typing import Literal,Optional
+from schemas.auth_schemas import UserPrincipal
+from schemas.user_schemas import Roles
+from utils.auth import get_current_active_principal
+from crud.export import stream_export,gzip_stream
+
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"]
+)
+
+
+@router.get("/{name}")
+async def export_table(
+    name:Literal["posts","users","comments"],
+    updated_since:Optional[datetime] = None,
+    compress:bool = Query(False,description="gzip the NDJSON stream"),
+    current_user:UserPrincipal = Depends(get_current_active_principal)
+):
+    """
+    Stream every row of a table as NDJSON (admin only).
+    Pass the X-Export-Started-At value of the previous pull as `updated_since`
+    to fetch only rows changed since then. Consecutive pulls overlap by
+    EXPORT_OVERLAP_SECONDS, so consumers must dedupe (upsert) on id.
+    """
+    if current_user.role != Roles.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can export data"
+        )
+        
+    #updated_at columns hold naive UTC; an offset-aware value would only fail
+    #once the 200 is already streaming
+    if updated_since is not None and updated_since.tzinfo is not None:
+        updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    started_at = datetime.utcnow().isoformat()
+    body = stream_export(name,updated_since)
+    filename = f"{name}.ndjson"
+    media_type = "application/x-ndjson"
+    
+    if compress:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+        
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition":f'attachment; filename="{filename}"',
+            "X-Export-Started-At":started_at,
+        }
+    )
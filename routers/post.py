@@ -1,15 +1,23 @@
-from db import get_db
-from schemas.posts_schemas import PostCreate,PostResponse,PostUpdate,PostStatusUpdate
+from db import get_db,get_read_db
+from schemas.posts_schemas import PostCreate,PostResponse,PostUpdate,PostStatusUpdate,PostPage,PostStatusEnum,PostSearchPage,BulkPostResult,BulkPostError
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter,Depends,HTTPException,status, UploadFile,File
+from fastapi import APIRouter,Depends,HTTPException,status, UploadFile,File,Query,Response,Request
 from crud.post import( create_post,update_post,delete_post,get_single_post,get_all_posts,
-                    get_published_posts,get_published_post,update_post_image)
+                    update_post_image,search_posts,bulk_create_posts)
+from crud.post_feed import sync_feed_entry,get_feed_page,get_feed_payload
 from models.models import User,Post
-from typing import List
+from typing import List,Optional,Union
 from uuid import UUID
-from utils.storage import save_upload_files
+from utils.storage import save_image_upload
+from utils.media_store import release_references,image_urls
 from schemas.user_schemas import Roles
-from utils.auth import get_current_active_user
+from utils.auth import get_current_active_principal
+from schemas.auth_schemas import UserPrincipal
+from utils.pagination import paginate_rows
+from utils.cache import cached,post_key,listing_key,invalidate_post
+from utils.serialization import list_response,model_response
+from config import settings
+import json
 
 router = APIRouter(
     prefix="/posts",
@@ -18,28 +26,53 @@ router = APIRouter(
 
 #public routes
 @router.get("/{post_id}/public",response_model=PostResponse)
-async def get_public_post(
-    post_id:UUID,
-    db:AsyncSession = Depends(get_db)
-):
+async def get_public_post(post_id:UUID):
+    async def load(db:AsyncSession) -> str:
+        return await get_feed_payload(db,post_id)
     
-    return await get_published_post(db,post_id)
+    payload = await cached(post_key(post_id),load)
+    return Response(content=payload,media_type="application/json")
 
 
-@router.get("/public", response_model=List[PostResponse])
+@router.get("/public", response_model=Union[PostPage,List[PostResponse]])
 async def get_public_posts(
-    db: AsyncSession = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = Query(20,ge=1,le=100),
+    cursor: Optional[str] = None
+):
+    """
+    Offset pagination by default. Pass `cursor` (empty for the first page)
+    to switch to keyset pagination and get back `next_cursor`.
+    Rows come pre-serialized from post_feed and are only concatenated here.
+    """
+    async def load(db:AsyncSession) -> str:
+        return await get_feed_page(db,skip,limit,cursor)
+
+    payload = await cached(await listing_key(skip,limit,cursor),load)
+    return Response(content=payload,media_type="application/json")
+
+
+@router.get("/search", response_model=PostSearchPage)
+async def search_public_posts(
+    q: str = Query(...,min_length=2,max_length=200),
+    category_id: Optional[UUID] = None,
+    tag_id: Optional[UUID] = None,
+    limit: int = Query(20,ge=1,le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    return await get_published_posts(db, skip, limit)
+    """
+    Ranked full-text search over published posts with highlighted snippets
+    """
+    items,next_cursor = await search_posts(db,q,limit,cursor,category_id,tag_id)
+    return PostSearchPage(items=items,next_cursor=next_cursor)
 
 
 #Post management routes (common for admin and author)
 @router.post("/",response_model=PostResponse)
 async def create_new_post(post:PostCreate,
                           db:AsyncSession = Depends(get_db),
-                          current_user:User = Depends(get_current_active_user)
+                          current_user:UserPrincipal = Depends(get_current_active_principal)
                     ):
         
     if current_user.role not in [Roles.admin,Roles.author]:
@@ -48,18 +81,87 @@ async def create_new_post(post:PostCreate,
             detail="Permission denied"
         )    
     try:        
-        new_post = await create_post(db,current_user,image_url,post)
+        new_post = await create_post(db,current_user,None,post)
         return new_post
     
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail=f"errors occurs {e}")
 
+async def read_ndjson(request:Request):
+    """Yield (line number, parsed object) pairs as the body streams in"""
+    buffer = b""
+    index = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines,buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index,line
+            index += 1
+    if buffer.strip():
+        yield index,buffer
+
+
+@router.post("/bulk",response_model=BulkPostResult)
+async def bulk_import_posts(
+    request:Request,
+    db:AsyncSession = Depends(get_db),
+    current_user:UserPrincipal = Depends(get_current_active_principal)
+):
+    """
+    Import many posts at once from NDJSON (application/x-ndjson) or a JSON array.
+    Rows are written in batches; invalid rows are reported by index and skipped.
+    """
+    if current_user.role not in [Roles.admin,Roles.author]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied"
+        )
+        
+    report = BulkPostResult()
+    
+    async def flush(batch):
+        result = await bulk_create_posts(db,current_user,batch)
+        report.created += result.created
+        report.errors.extend(result.errors)
+        batch.clear()
+    
+    batch = []
+    if "ndjson" in request.headers.get("content-type",""):
+        async for index,line in read_ndjson(request):
+            try:
+                batch.append((index,json.loads(line)))
+            except ValueError:
+                report.errors.append(BulkPostError(index=index,error="Invalid JSON"))
+            if len(batch) >= settings.BULK_BATCH_SIZE:
+                await flush(batch)
+    else:
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Invalid JSON body")
+        if not isinstance(rows,list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Expected a JSON array of posts")
+        
+        for index,row in enumerate(rows):
+            batch.append((index,row))
+            if len(batch) >= settings.BULK_BATCH_SIZE:
+                await flush(batch)
+                
+    if batch:
+        await flush(batch)
+        
+    report.errors.sort(key=lambda error:error.index)
+    report.failed = len(report.errors)
+    return report
+
+
 @router.post("/{post_id}/image",response_model=PostResponse)
 async def upload_post_image(
     post_id:UUID,
     file:UploadFile = File(...),
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
     post = await get_single_post(db,post_id,current_user)
     
@@ -69,11 +171,19 @@ async def upload_post_image(
             detail="Post not found"
         )
         
-    image_url = await save_upload_files(file,subdir="posts")
+    old_urls = image_urls(post)
+    image_url,variants,image_hash = await save_image_upload(db,file)
+    await release_references(db,old_urls)
+    
     post.image_url = image_url
+    post.image_variants = variants
+    post.image_hash = image_hash
     
+    await db.flush()
+    await sync_feed_entry(db,post)
     await db.commit()
-    await db.refresh(post)
+    
+    await invalidate_post(post.id,listings=post.status == PostStatusEnum.published)
 
     return post
 
@@ -82,7 +192,7 @@ async def update_post_image_route(
     post_id:UUID,
     file:UploadFile = File(...),
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
     return await update_post_image(db,post_id,file,current_user)
     
@@ -91,22 +201,31 @@ async def update_post_image_route(
     
         
     
-@router.get("/",response_model=List[PostResponse])
+@router.get("/",response_model=Union[PostPage,List[PostResponse]])
 async def get_all_posts_route(
+    skip:int = 0,
+    limit:int = Query(100,ge=1,le=100),
+    cursor:Optional[str] = None,
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
-    
-    posts = await get_all_posts(db,current_user)
-    
-    return posts
+    """
+    Offset pagination by default. Pass `cursor` (empty for the first page)
+    to switch to keyset pagination and get back `next_cursor`.
+    """
+    posts = await get_all_posts(db,current_user,skip,limit,cursor)
+    if cursor is None:
+        return list_response(PostResponse,posts)
+
+    items,next_cursor = paginate_rows(posts,limit)
+    return model_response(PostPage.model_validate({"items":items,"next_cursor":next_cursor},from_attributes=True))
 
 
 @router.get("/{post_id}",response_model=PostResponse)
 async def get_single_post_route(
     post_id:UUID,
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
     post = await get_single_post(db,post_id,current_user)
     
@@ -118,7 +237,7 @@ async def update_posts(
     post_id:UUID,
     post_data:PostUpdate,
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
  
     updated_post = await update_post(db,post_id,current_user,post_data)
@@ -130,7 +249,7 @@ async def update_posts(
 async def delete_post_route(
     post_id:UUID,
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
     """Only admins or authors can delete"""
     deleted_post =await delete_post(db,post_id,current_user)
@@ -142,10 +261,10 @@ async def update_post_status(
     post_id:UUID,
     status_update:PostStatusUpdate,
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
     
 ):
-    post = await get_single_post(db,post_id)
+    post = await get_single_post(db,post_id,current_user)
     if not post:
         raise HTTPException(
             status_code=404,
@@ -158,11 +277,15 @@ async def update_post_status(
             detail="Only admins can update post status"
         )
         
+    was_published = post.status == PostStatusEnum.published
     post.status = status_update.status
     
     db.add(post)
+    await db.flush()
+    await sync_feed_entry(db,post)
     await db.commit()
-    await db.refresh(post)
+    
+    await invalidate_post(post.id,listings=was_published or post.status == PostStatusEnum.published)
     
     return post
 
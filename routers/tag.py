@@ -2,11 +2,13 @@ from crud.tag import create_tags,get_all_tags,get_single_tag,delete_tags
 from fastapi import APIRouter,HTTPException,status,Depends,Path
 from schemas.tag_schemas import TagCreate,TagResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from db import get_db
+from db import get_db,get_read_db
 from schemas.user_schemas import Roles
 from typing import List
 from uuid import UUID
-from utils.auth import get_current_active_user
+from utils.auth import get_current_active_principal
+from schemas.auth_schemas import UserPrincipal
+from utils.serialization import list_response
 
 
 router = APIRouter(
@@ -15,7 +17,7 @@ router = APIRouter(
 )
 
 @router.post("/",response_model=TagResponse)
-async def create_new_tag(tag:TagCreate,db:AsyncSession = Depends(get_db),current_user = Depends(get_current_active_user)):
+async def create_new_tag(tag:TagCreate,db:AsyncSession = Depends(get_db),current_user:UserPrincipal = Depends(get_current_active_principal)):
     try:
         new_tag = await create_tags(db,tag,current_user)
         return new_tag
@@ -25,15 +27,15 @@ async def create_new_tag(tag:TagCreate,db:AsyncSession = Depends(get_db),current
     
 @router.get("/",response_model=List[TagResponse])
 async def get_all_tags_route(
-    db:AsyncSession = Depends(get_db)):
+    db:AsyncSession = Depends(get_read_db)):
     
-    return await get_all_tags(db)
+    return list_response(TagResponse,await get_all_tags(db))
 
 
 @router.get("/{tag_id}",response_model=TagResponse)
 async def get_single_tag_route(
     tag_id:UUID,
-    db:AsyncSession = Depends(get_db)
+    db:AsyncSession = Depends(get_read_db)
     
 ):
     tag = await get_single_tag(db,tag_id)
@@ -45,7 +47,7 @@ async def get_single_tag_route(
 async def delete_tag_route(
     tag_id:UUID = Path(...,title="Id of the tag to delete"),
     db:AsyncSession = Depends(get_db),
-    current_user = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
     
 ):
     if current_user.role != Roles.admin:
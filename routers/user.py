@@ -3,18 +3,22 @@ from crud.user import (create_user,get_users,get_user_by_email,update_user_attri
 from db import get_db
 from uuid import UUID
 from typing import List, Optional
-from utils.auth import get_current_active_user
-from utils.security import generate_otp, generate_secure_token,hashed_password, verify_password
+from utils.auth import get_current_active_user,get_current_active_principal
+from schemas.auth_schemas import UserPrincipal
+from utils.security import generate_otp,hashed_password_async, verify_password_async
 from sqlalchemy import select
 from schemas.user_schemas import (
             UserCreate,UserResponse,Roles,MeUserResponse, AccountStatusEnum,PasswordResetRequest,
             OTPVerification, PasswordChange, UserUpdate,UserRoleUpdate)
 from models.models import User
-from fastapi import APIRouter,Depends,HTTPException,status, Form
+from fastapi import APIRouter,Depends,HTTPException,status, Form, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile,File,Path,Body
-from utils.email import render_email_template,send_email_smtp_async
-from utils.redis import store_in_redis,get_from_redis,delete_from_redis
+from utils.email import render_email_template_async,enqueue_email
+from utils.otp import issue_otp,verify_otp,consume_reset_token,OTPState
+from utils.principal_cache import bump_user_version
+from utils.serialization import list_response
+from utils.rate_limit import check_rate_limit
 
 
 router = APIRouter(
@@ -28,12 +32,12 @@ async def create_new_user(user_data:UserCreate,db:AsyncSession = Depends(get_db)
     new_user = await create_user(db,user_data)
     
     #Send welcome email
-    email_html = render_email_template(
+    email_html = await render_email_template_async(
         "register.html",
         {"user_name":user_data.username,"user_email":user_data.email,"user_role":"user"}
     )
     
-    await send_email_smtp_async(
+    await enqueue_email(
         recipient=user_data.email,
         subject="Welcome to My app",
         html_content=email_html
@@ -44,28 +48,32 @@ async def create_new_user(user_data:UserCreate,db:AsyncSession = Depends(get_db)
 #Password management routes
 @router.post("/password/request-reset",status_code=status.HTTP_202_ACCEPTED)
 async def request_password_reset(
+    request:Request,
     email_data:PasswordResetRequest,
     db:AsyncSession = Depends(get_db)
 ):
     """
     Request a password reset by sending an OTP
     """
+    await check_rate_limit(request,"password_reset",email_data.email)
+    
     user = await get_user_by_email(db,email_data.email)
     if not user:
         # Return success anyway to prevent email enumeration
         return {"message": "An OTP has been sent"}
     
-    #Generate and store otp
+    #Generate and store otp, unless the address is locked out after too many wrong guesses
     otp = generate_otp()
-    await store_in_redis(f"otp:{email_data.email}",otp,ttl=600) #10 minutes expiry
+    if await issue_otp(email_data.email,otp):
+        return {"message":"If the email exists, an OTP has been sent"}
     
     #Send OTP via email
-    email_html = render_email_template(
+    email_html = await render_email_template_async(
         "password_change_otp.html",
         {"otp":otp,"user_name":user.username}
     )
     
-    await send_email_smtp_async(
+    await enqueue_email(
         recipient=email_data.email,
         subject="Your Password Reset OTP",
         html_content=email_html
@@ -75,41 +83,44 @@ async def request_password_reset(
     
     
 @router.post("/password/validate-otp",status_code=status.HTTP_200_OK)
-async def validate_otp(otp_data:OTPVerification):
+async def validate_otp(request:Request,otp_data:OTPVerification):
     """
     Validate the OTP and return a reset token
     """
-    stored_otp = await get_from_redis(f"otp:{otp_data.email}")
+    await check_rate_limit(request,"otp",otp_data.email)
+    
+    #Check, consume and issue the reset token in one atomic step
+    state,value,reset_token = await verify_otp(otp_data.email,otp_data.otp)
     
-    if not stored_otp or stored_otp != otp_data.otp:
+    if state == OTPState.locked:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many invalid attempts, request a new OTP later",
+            headers={"Retry-After":str(value)}
+        )
+        
+    if state == OTPState.invalid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP"
         )
-        
-    #Delete the OTP to prevent reuse
-    await delete_from_redis(f"otp:{otp_data.email}")
-    
-    #Generate and store reset token
-    reset_token = generate_secure_token()
-    await store_in_redis(f"reset_token:{otp_data.email}",reset_token,ttl=900) #15 minutes expiry
     
     return {"reset_token":reset_token}
 
 
 @router.post("/password/reset",status_code=status.HTTP_200_OK)
 async def reset_password(
+    request:Request,
     password_data:PasswordChange,
     db:AsyncSession = Depends(get_db)
 ):
     """
     Reset a user's password using the reset token
     """
+    await check_rate_limit(request,"reset_token",password_data.email)
     
-    #Validate reset token
-    stored_token = await get_from_redis(f"reset_token:{password_data.email}")
-    
-    if not stored_token or stored_token != password_data.reset_token:
+    #Validate and consume the reset token so it can't be redeemed twice
+    if not await consume_reset_token(password_data.email,password_data.reset_token):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired token"
@@ -124,21 +135,18 @@ async def reset_password(
         )
         
     #Update password
-    user.hash_password = hashed_password(password_data.new_password)
+    user.hash_password = await hashed_password_async(password_data.new_password)
     db.add(user)
     await db.commit()
-        
-    #Delete reset token to prevent reuse
-    await delete_from_redis(f"reset_token:{password_data.email}")
     
     #Send confirmation email
-    email_html = render_email_template(
+    email_html = await render_email_template_async(
         "password_change_confirmation.html",
         {"user_name":user.username}
         
     )
     
-    await send_email_smtp_async(
+    await enqueue_email(
         recipient=user.email,
         subject="Your Password has been changed",
         html_content=email_html
@@ -158,24 +166,24 @@ async def change_password(
     Change the password of the authenticated user
     """
     #Verify current password
-    if not verify_password(current_password,current_user.hash_password):
+    if not await verify_password_async(current_password,current_user.hash_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
         
     #Update password
-    current_user.hash_password = hashed_password(new_password)
+    current_user.hash_password = await hashed_password_async(new_password)
     db.add(current_user)
     await db.commit()
         
         
     # Send confirmation email
-    email_html = render_email_template(
+    email_html = await render_email_template_async(
         "password_change_confirmation.html", 
         {"user_name": current_user.username}
     )
-    await send_email_smtp_async(
+    await enqueue_email(
         recipient=current_user.email,
         subject="Your Password Has Been Changed",
         html_content=email_html
@@ -199,7 +207,7 @@ async def update_user_profile(
     update_user = await update_user_attributes(current_user,user_update,current_user,db)
     db.add(update_user)
     await db.commit()
-    await db.refresh(update_user)
+    await bump_user_version(update_user.id)
 
     return {"message":"User updated successfully","updated_user":update_user}
 
@@ -213,7 +221,11 @@ async def upload_profile_picture(
     Upload or update profile picture for authenticated user
     """
     updated_user = await update_user_image(db,current_user,file)
-    return {"message":"Profile image updated","image_url":updated_user.image_url}
+    return {
+        "message":"Profile image updated",
+        "image_url":updated_user.image_url,
+        "image_variants":updated_user.image_variants
+    }
 
         
 # Admin routes for user management
@@ -223,7 +235,7 @@ async def get_all_users(
     limit:int = 100,
     role:Optional[Roles] = None,
     statuss:Optional[AccountStatusEnum] = None,
-    current_user:User = Depends(get_current_active_user),
+    current_user:UserPrincipal = Depends(get_current_active_principal),
     db:AsyncSession = Depends(get_db)
 ):
     """
@@ -240,14 +252,14 @@ async def get_all_users(
     }
     
     users = await get_users(db,skip,limit,filters)
-    return users
+    return list_response(UserResponse,users)
 
 
 @router.get("/{user_id}",response_model=MeUserResponse)
 async def get_user_by_id_route(
     user_id:UUID = Path(...,title="The id of user to get"),
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
     
 ):
     """
@@ -276,7 +288,7 @@ async def update_user_route(
     user_id:UUID = Path(...,title="The Id of the user to update"),
     user_update:UserUpdate = Body(...),
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
     
 ):
     """
@@ -290,7 +302,7 @@ async def update_user_route(
 async def delete_user_route(
     user_id:UUID = Path(...,title="The Id of user to delete"),
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
     
 ):
     """
@@ -305,7 +317,7 @@ async def delete_user_route(
 async def verify_user(
     user_id:UUID = Path(...,title="The Id of user to verify"),
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 
 ):
     """
@@ -329,14 +341,15 @@ async def verify_user(
     
     db.add(user)
     await db.commit()
+    await bump_user_version(user.id)
     
     #Send verification confirmation email
-    email_html = render_email_template(
+    email_html = await render_email_template_async(
         "account_verified.html",
         {"user_name":user.username}
     )
 
-    await send_email_smtp_async(
+    await enqueue_email(
         recipient=user.email,
         subject="Your account has been verified",
         html_content=email_html
@@ -350,7 +363,7 @@ async def update_role_route(
     user_id:UUID,
     role_data:UserRoleUpdate,
     db:AsyncSession = Depends(get_db),
-    current_user:User = Depends(get_current_active_user)
+    current_user:UserPrincipal = Depends(get_current_active_principal)
 ):
     
     new_role = Roles(role_data.role)
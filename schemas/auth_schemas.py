@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
+from uuid import UUID
+from schemas.user_schemas import Roles,AccountStatusEnum
 
 class Token(BaseModel):
     access_token:str
@@ -12,5 +14,14 @@ class LoginRequest(BaseModel):
     
 class TokenData(BaseModel):
     email:Optional[str] = None
+
+
+class UserPrincipal(BaseModel):
+    """Minimal identity resolved from a token without loading the User row"""
+    id:UUID
+    role:Roles
+    status:Optional[AccountStatusEnum] = None
     
-    
\ No newline at end of file
+    model_config = {
+        "from_attributes": True
+    }
@@ -1,6 +1,6 @@
 from pydantic import BaseModel,Field,field_serializer
-from typing import Optional
-from config import settings
+from typing import Optional,Dict
+from .media_urls import absolute_url,absolute_urls
 from uuid import UUID
 
 
@@ -14,12 +14,16 @@ class CategoryResponse(BaseModel):
     name:str
     description:Optional[str] = None
     image_url:Optional[str] = None
+    image_variants:Optional[Dict[str,str]] = None
+    published_post_count:int = 0
+    total_post_count:int = 0
     @field_serializer("image_url")
     def serialize_image_url(self,image_url:Optional[str]) -> Optional[str]:
-        if not image_url:
-            return None
-        
-        return f"{settings.BASE_URL}{image_url}"
+        return absolute_url(image_url)
+    
+    @field_serializer("image_variants")
+    def serialize_image_variants(self,image_variants:Optional[Dict[str,str]]) -> Optional[Dict[str,str]]:
+        return absolute_urls(image_variants)
     
     class Config:
         from_attributes=True
@@ -0,0 +1,25 @@
+from pydantic import BaseModel,Field
+from typing import List,Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class CommentCreate(BaseModel):
+    message:str = Field(...,min_length=1,max_length=2000)
+
+
+class CommentResponse(BaseModel):
+    id:UUID
+    post_id:UUID
+    user_id:UUID
+    username:str
+    message:str
+    created_at:datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CommentPage(BaseModel):
+    items:List[CommentResponse]
+    next_cursor:Optional[str] = None
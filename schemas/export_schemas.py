@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+from .user_schemas import UserResponse
+
+
+#Export rows carry updated_at so consumers can resume with updated_since
+class UserExport(UserResponse):
+    verified:Optional[bool] = None
+    updated_at:Optional[datetime] = None
+    last_login:Optional[datetime] = None
+
+
+class CommentExport(BaseModel):
+    id:UUID
+    post_id:UUID
+    user_id:UUID
+    message:str
+    created_at:Optional[datetime] = None
+    updated_at:Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,17 @@
+from typing import Optional,Dict
+from config import settings
+
+#Resolved once at import instead of on every serialized row
+BASE_URL = settings.BASE_URL
+
+
+def absolute_url(path:Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    return BASE_URL + path
+
+
+def absolute_urls(variants:Optional[Dict[str,str]]) -> Optional[Dict[str,str]]:
+    if not variants:
+        return None
+    return {name:BASE_URL + url for name,url in variants.items()}
@@ -1,10 +1,10 @@
 from pydantic import BaseModel,Field,field_serializer
-from config import settings
-from typing import Optional,List
+from .media_urls import absolute_url,absolute_urls
+from typing import Optional,List,Dict
 from datetime import datetime
 from uuid import UUID
 from enum import Enum
-from .tag_schemas import TagResponse
+from .tag_schemas import TagSummary
 
 class PostStatusEnum(str, Enum):
     draft = "draft"                
@@ -43,9 +43,11 @@ class PostResponse(BaseModel):
     description: Optional[str]
     content: str
     image_url: Optional[str]
+    image_variants: Optional[Dict[str,str]] = None
     author_id: UUID
     category_id: UUID
-    tags: List[TagResponse] = []
+    tags: List[TagSummary] = []
+    comment_count: int = 0
     created_at: datetime
     updated_at: datetime
     status:PostStatusEnum
@@ -53,14 +55,41 @@ class PostResponse(BaseModel):
     updated_at:datetime
     @field_serializer("image_url")
     def serialize_image_url(self,image_url:Optional[str]) -> Optional[str]:
-        if not image_url:
-            return None
-        
-        return f"{settings.BASE_URL}{image_url}"
+        return absolute_url(image_url)
+    
+    @field_serializer("image_variants")
+    def serialize_image_variants(self,image_variants:Optional[Dict[str,str]]) -> Optional[Dict[str,str]]:
+        return absolute_urls(image_variants)
     
     class Config:
         from_attributes = True
     
 
 class PostStatusUpdate(BaseModel):
-    status:PostStatusEnum
\ No newline at end of file
+    status:PostStatusEnum
+
+class PostPage(BaseModel):
+    items:List[PostResponse]
+    next_cursor:Optional[str] = None
+
+
+class PostSearchHit(PostResponse):
+    rank:float
+    snippet:str
+
+
+#Each snippet is HTML-escaped post content in which only the <mark> tags around matches are markup
+class PostSearchPage(BaseModel):
+    items:List[PostSearchHit]
+    next_cursor:Optional[str] = None
+
+
+class BulkPostError(BaseModel):
+    index:int
+    error:str
+
+
+class BulkPostResult(BaseModel):
+    created:int = 0
+    failed:int = 0
+    errors:List[BulkPostError] = []
@@ -8,12 +8,18 @@ class TagCreate(BaseModel):
     description:Optional[str] = None
     
     
-class TagResponse(TagCreate): 
+class TagSummary(TagCreate):
+    """Tag as embedded in posts, without the counters that change on every publish"""
     id:UUID
     
     model_config = {
         "from_attributes": True
     }
+    
+    
+class TagResponse(TagSummary): 
+    published_post_count:int = 0
+    total_post_count:int = 0
 
 class TagUpdate(BaseModel):
     name:Optional[str] = None
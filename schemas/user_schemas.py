@@ -1,6 +1,6 @@
 from pydantic import BaseModel,EmailStr,Field,field_serializer, validator
-from typing import Optional,Literal
-from config import settings
+from typing import Optional,Literal,Dict
+from .media_urls import absolute_url,absolute_urls
 from enum import Enum
 from uuid import UUID
 from datetime import datetime
@@ -32,13 +32,15 @@ class UserResponse(BaseModel):
     role:Roles
     status:AccountStatusEnum
     image_url:Optional[str] = None
+    image_variants:Optional[Dict[str,str]] = None
     created_at:datetime
     @field_serializer("image_url")
     def serialize_image_url(self,image_url:Optional[str]) -> Optional[str]:
-        if not image_url:
-            return None
-        
-        return f"{settings.BASE_URL}{image_url}"
+        return absolute_url(image_url)
+    
+    @field_serializer("image_variants")
+    def serialize_image_variants(self,image_variants:Optional[Dict[str,str]]) -> Optional[Dict[str,str]]:
+        return absolute_urls(image_variants)
     
     class Config:
         from_attributes=True
@@ -0,0 +1,57 @@
+"""
+Per-render cost of email templates: legacy lookup-per-call vs precompiled registry.
+
+Run from the project root: python -m scripts.bench_email_templates
+"""
+import asyncio
+import timeit
+from datetime import datetime
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from utils.email import (TEMPLATE_DIR, load_email_templates, render_email_template,
+                         render_email_template_async)
+
+ROUNDS = 5000
+
+CASES = {
+    "register.html": {"user_name": "Jane", "user_email": "jane@example.com", "user_role": "user"},
+    "password_change_otp.html": {"otp": "123456", "user_name": "Jane"},
+}
+
+legacy_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html", "xml"]),
+)
+
+
+#Behaviour before the registry: template lookup, context mutation and utcnow per call
+def legacy_render(template_name: str, context: dict) -> str:
+    template = legacy_env.get_template(template_name)
+    context.update({
+        "app_name": "My app",
+        "year": datetime.utcnow().year,
+    })
+    return template.render(**context)
+
+
+async def async_rounds(template_name: str, context: dict):
+    for _ in range(ROUNDS):
+        await render_email_template_async(template_name, context)
+
+
+def main():
+    load_email_templates()
+    for name, context in CASES.items():
+        legacy = timeit.timeit(lambda: legacy_render(name, dict(context)), number=ROUNDS)
+        compiled = timeit.timeit(lambda: render_email_template(name, context), number=ROUNDS)
+        started = timeit.default_timer()
+        asyncio.run(async_rounds(name, context))
+        compiled_async = timeit.default_timer() - started
+
+        print(f"{name}")
+        print(f"  legacy         {legacy / ROUNDS * 1e6:8.1f} us/render")
+        print(f"  compiled       {compiled / ROUNDS * 1e6:8.1f} us/render")
+        print(f"  compiled async {compiled_async / ROUNDS * 1e6:8.1f} us/render")
+
+
+if __name__ == "__main__":
+    main()
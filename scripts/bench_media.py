@@ -0,0 +1,68 @@
+"""
+Compare the old StaticFiles mount with MediaFiles for the uploads tree.
+
+Measures in-process request cost for full GETs, Range GETs and revalidation
+(If-None-Match) against the largest file under MEDIA_ROOT. Run behind the real
+server for network numbers; this isolates the Python-side work.
+
+Run from the project root: python -m scripts.bench_media --requests 2000
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+from config import settings
+from utils.media_server import MediaFiles
+
+
+def build_app(handler) -> Starlette:
+    return Starlette(routes=[Mount(settings.MEDIA_URL, app=handler)])
+
+
+async def timed(client: httpx.AsyncClient, url: str, requests: int, headers: dict | None = None) -> tuple[float, int]:
+    transferred = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(url, headers=headers)
+        transferred += len(response.content)
+    return (time.perf_counter() - started) / requests * 1e6, transferred // requests
+
+
+async def bench(name: str, handler, url: str, requests: int):
+    transport = httpx.ASGITransport(app=build_app(handler))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get(url)
+        etag = first.headers.get("etag")
+
+        full, full_bytes = await timed(client, url, requests)
+        ranged, ranged_bytes = await timed(client, url, requests, {"range": "bytes=0-65535"})
+        revalidate, revalidate_bytes = await timed(client, url, requests, {"if-none-match": etag} if etag else None)
+
+    print(f"{name}")
+    print(f"  cache-control: {first.headers.get('cache-control')}")
+    print(f"  full GET     {full:8.1f} us/req  {full_bytes} bytes")
+    print(f"  range GET    {ranged:8.1f} us/req  {ranged_bytes} bytes")
+    print(f"  revalidate   {revalidate:8.1f} us/req  {revalidate_bytes} bytes")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    files = [path for path in settings.MEDIA_ROOT.rglob("*") if path.is_file()]
+    if not files:
+        raise SystemExit(f"No files under {settings.MEDIA_ROOT}")
+    target = max(files, key=lambda path: path.stat().st_size)
+    url = f"{settings.MEDIA_URL}/{target.relative_to(settings.MEDIA_ROOT).as_posix()}"
+    print(f"target: {url} ({target.stat().st_size} bytes)\n")
+
+    await bench("StaticFiles", StaticFiles(directory=settings.MEDIA_ROOT), url, args.requests)
+    await bench("MediaFiles", MediaFiles(settings.MEDIA_ROOT), url, args.requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Full-text search benchmark on a synthetic corpus.
+
+Seeds N published posts (default 1,000,000) with random words into the
+configured database, then times ranked search queries through crud.post.search_posts.
+Point DATABASE_URL at a scratch database before running.
+
+Run from the project root: python -m scripts.bench_search --posts 1000000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from sqlalchemy import text
+from db import engine, async_session
+from models.models import User, Category
+from crud.post import search_posts
+
+WORDS = [
+    "python", "fastapi", "postgres", "redis", "async", "database", "index", "query",
+    "cache", "search", "content", "blog", "author", "editor", "release", "deploy",
+    "latency", "throughput", "worker", "migration", "schema", "cursor", "image", "upload",
+    "travel", "cooking", "garden", "music", "football", "science", "history", "finance",
+]
+
+BATCH = 100_000
+
+SEED_SQL = text("""
+INSERT INTO posts (id, title, description, content, status, author_id, category_id, created_at, updated_at)
+SELECT
+    gen_random_uuid(),
+    (SELECT string_agg(w, ' ') FROM (SELECT (CAST(:words AS text[]))[1 + floor(random() * :n)::int] AS w
+        FROM generate_series(1, 6) WHERE g > 0) t),
+    (SELECT string_agg(w, ' ') FROM (SELECT (CAST(:words AS text[]))[1 + floor(random() * :n)::int] AS w
+        FROM generate_series(1, 20) WHERE g > 0) d),
+    (SELECT string_agg(w, ' ') FROM (SELECT (CAST(:words AS text[]))[1 + floor(random() * :n)::int] AS w
+        FROM generate_series(1, 200) WHERE g > 0) c),
+    'published',
+    :author_id,
+    :category_id,
+    now() - (g || ' seconds')::interval,
+    now()
+FROM generate_series(1, :batch) AS g
+""")
+
+
+async def seed(total: int):
+    async with async_session() as db:
+        author = User(
+            username="bench", email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+            phone=uuid.uuid4().hex[:10], hash_password="x"
+        )
+        category = Category(name=f"bench-{uuid.uuid4().hex[:8]}")
+        db.add_all([author, category])
+        await db.commit()
+
+        for done in range(0, total, BATCH):
+            await db.execute(SEED_SQL, {
+                "words": WORDS, "n": len(WORDS), "batch": min(BATCH, total - done),
+                "author_id": author.id, "category_id": category.id,
+            })
+            await db.commit()
+            print(f"seeded {min(done + BATCH, total)}/{total}")
+
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE posts"))
+
+
+async def bench(queries: int):
+    timings = []
+    async with async_session() as db:
+        for _ in range(queries):
+            q = " ".join(random.sample(WORDS, 2))
+            started = time.perf_counter()
+            await search_posts(db, q, limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    print(f"queries: {queries}")
+    print(f"p50: {statistics.median(timings):.1f} ms")
+    print(f"p95: {timings[int(len(timings) * 0.95) - 1]:.1f} ms")
+    print(f"max: {timings[-1]:.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        await seed(args.posts)
+    await bench(args.queries)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Compare list response serialization paths for posts.
+
+- response_model: validate each row, dump to Python, encode with the stdlib json
+  (what FastAPI does for `return posts` with response_model=List[PostResponse])
+- orjson: same Python dump, encoded with orjson (ORJSONResponse)
+- adapter: TypeAdapter(list[PostResponse]) validate + dump_json in one pass
+  (utils.serialization.list_response)
+
+Rows are transient ORM objects, so no database is needed.
+
+Run from the project root: python -m scripts.bench_serialization --rounds 50
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+import orjson
+from models.models import Post,Tag
+from schemas.posts_schemas import PostResponse,PostStatusEnum
+from utils.serialization import dump_list
+
+
+def make_posts(count:int) -> list[Post]:
+    tags = [Tag(id=uuid.uuid4(),name=f"tag-{i}",description="Synthetic tag") for i in range(5)]
+    now = datetime.utcnow()
+    posts = []
+    for i in range(count):
+        post = Post(
+            id=uuid.uuid4(),
+            title=f"Post number {i}",
+            description="A short description of the post",
+            content="Lorem ipsum dolor sit amet " * 40,
+            image_url=f"/uploads/objects/ab/cd/{uuid.uuid4().hex}.webp",
+            image_variants={name:f"/uploads/objects/ab/cd/{uuid.uuid4().hex}.webp" for name in ("thumbnail","card","full")},
+            status=PostStatusEnum.published,
+            author_id=uuid.uuid4(),
+            category_id=uuid.uuid4(),
+            comment_count=i % 7,
+            created_at=now,
+            updated_at=now,
+        )
+        post.tags = tags[:i % 5]
+        posts.append(post)
+    return posts
+
+
+def response_model_path(posts) -> bytes:
+    content = [PostResponse.model_validate(post).model_dump(mode="json") for post in posts]
+    return json.dumps(content,ensure_ascii=False,separators=(",",":")).encode()
+
+
+def orjson_path(posts) -> bytes:
+    return orjson.dumps([PostResponse.model_validate(post).model_dump(mode="json") for post in posts])
+
+
+def adapter_path(posts) -> bytes:
+    return dump_list(PostResponse,posts)
+
+
+def bench(name:str,func,posts,rounds:int):
+    func(posts)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        body = func(posts)
+    elapsed = (time.perf_counter() - started) / rounds * 1000
+    print(f"  {name:<15} {elapsed:8.2f} ms/response  {len(body)} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds",type=int,default=50)
+    args = parser.parse_args()
+
+    for count in (100,1000):
+        posts = make_posts(count)
+        assert json.loads(response_model_path(posts)) == json.loads(adapter_path(posts))
+        print(f"{count} posts")
+        bench("response_model",response_model_path,posts,args.rounds)
+        bench("orjson",orjson_path,posts,args.rounds)
+        bench("adapter",adapter_path,posts,args.rounds)
+
+
+if __name__ == "__main__":
+    main()
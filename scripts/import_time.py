@@ -0,0 +1,74 @@
+"""
+Profile how long `import main` takes and which modules dominate it.
+
+Runs a fresh interpreter with `python -X importtime`, aggregates the report
+and prints the slowest top-level packages and modules. With --budget-ms the
+script exits non-zero when the total exceeds the budget, so CI can guard
+worker cold-start time.
+
+Run from the project root: python -m scripts.import_time --top 25
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def profile(module:str) -> list[tuple[str,int,int]]:
+    """(module, self us, cumulative us) for every import made by `import module`"""
+    result = subprocess.run(
+        [sys.executable,"-X","importtime","-c",f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us,cumulative_us,name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(),int(self_us),int(cumulative_us)))
+    return rows
+
+
+def total_ms(rows:list[tuple[str,int,int]],module:str) -> float:
+    return next(cumulative for name,_,cumulative in reversed(rows) if name.strip() == module) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module",default="main")
+    parser.add_argument("--top",type=int,default=20)
+    parser.add_argument("--budget-ms",type=float,default=None)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total = total_ms(rows,args.module)
+
+    #Self time summed per top-level package shows which dependency to make lazy
+    packages = defaultdict(int)
+    for name,self_us,_ in rows:
+        packages[name.strip().split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total:.1f} ms, {len(rows)} modules\n")
+    print("by package (self time)")
+    for package,self_us in sorted(packages.items(),key=lambda item:item[1],reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    print("\nslowest modules (cumulative)")
+    for name,_,cumulative_us in sorted(rows,key=lambda row:row[2],reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"\nimport {args.module} took {total:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
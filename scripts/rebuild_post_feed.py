@@ -0,0 +1,23 @@
+"""
+Re-render every post_feed row from the posts table.
+
+Run after the post_feed migration, after changing BASE_URL, or after changing
+the shape of PostResponse, since the feed stores its JSON verbatim.
+
+Run from the project root: python -m scripts.rebuild_post_feed
+"""
+import asyncio
+from db import async_session
+from crud.post_feed import rebuild_feed
+from utils.cache import invalidate_listings
+
+
+async def main():
+    async with async_session() as db:
+        count = await rebuild_feed(db)
+    await invalidate_listings()
+    print(f"post_feed rebuilt with {count} published posts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
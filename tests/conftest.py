@@ -0,0 +1,127 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0,str(ROOT))
+
+#Tests never run against DATABASE_URL: they use TEST_DATABASE_URL or a throwaway pgserver instance
+PGDATA = Path(tempfile.gettempdir())/"blog-test-pgdata"
+TEST_DATABASE = "blog_test"
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL",f"postgresql+asyncpg://postgres@/{TEST_DATABASE}?host={PGDATA}"
+)
+os.environ["REDIS_URL"] = "redis://localhost:6379/15"
+for name,value in {
+    "SECRET_KEY":"test-secret",
+    "ALGORITHM":"HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES":"30",
+    "REFRESH_TOKEN_EXPIRE_DAYS":"7",
+    "MAIL_SERVER":"localhost",
+    "MAIL_PORT":"25",
+    "MAIL_USERNAME":"test",
+    "MAIL_PASSWORD":"test",
+    "MAIL_FROM":"noreply@example.com",
+    "ADMIN_NAME":"admin",
+    "ADMIN_EMAIL":"admin@example.com",
+    "ADMIN_PASSWORD":"admin-password",
+    "PHONE_NUMBER":"0000000000",
+    #fakeredis does not answer the PING health check
+    "REDIS_HEALTH_CHECK_INTERVAL":"0",
+}.items():
+    os.environ.setdefault(name,value)
+
+import fakeredis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from utils.redis import redis_client,redis_pool
+
+#Every Redis call in the app goes through redis_pool, so swapping its connection class is enough
+redis_pool.connection_class = FakeAsyncRedisConnection
+redis_pool.connection_kwargs["server"] = fakeredis.FakeServer()
+
+#Trigger DDL lives in the migrations; create_all only builds tables and indexes
+MIGRATION_DDL = [
+    ("4b8e1f6a2c73_statement_level_counter_triggers",("POSTS_FUNCTION","POSTS_TRIGGERS","POST_TAGS_FUNCTION","POST_TAGS_TRIGGERS")),
+    ("1c6f9e3a7b48_comments_api",("COMMENTS_FUNCTION","COMMENTS_TRIGGER")),
+    ("7d2f4a8c5e19_post_feed_comment_count",("COMMENTS_FUNCTION",)),
+]
+
+
+def import_migration(module_name:str):
+    path = ROOT/"alembic"/"versions"/f"{module_name}.py"
+    spec = importlib.util.spec_from_file_location(module_name,path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def migration_statements() -> list[str]:
+    statements = []
+    for module_name,names in MIGRATION_DDL:
+        module = import_migration(module_name)
+        for name in names:
+            value = getattr(module,name)
+            statements.extend(value if isinstance(value,tuple) else [value])
+    return statements
+
+
+async def create_schema(url:str):
+    from db import Base
+    from models import models  # noqa: F401
+
+    schema_engine = create_async_engine(url,poolclass=NullPool)
+    async with schema_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in migration_statements():
+            await conn.execute(text(statement))
+    await schema_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def database():
+    server = None
+    if "TEST_DATABASE_URL" not in os.environ:
+        pgserver = pytest.importorskip("pgserver")
+        server = pgserver.get_server(PGDATA,cleanup_mode="stop")
+        server.psql(f"DROP DATABASE IF EXISTS {TEST_DATABASE}")
+        server.psql(f"CREATE DATABASE {TEST_DATABASE}")
+
+    asyncio.run(create_schema(os.environ["DATABASE_URL"]))
+    yield server
+
+
+@pytest.fixture
+def load_migration():
+    return import_migration
+
+
+@pytest.fixture
+async def db(database):
+    from db import async_session,engine
+
+    async with engine.begin() as conn:
+        tables = (await conn.execute(text(
+            "SELECT string_agg(quote_ident(tablename), ', ') FROM pg_tables WHERE schemaname = 'public'"
+        ))).scalar_one()
+        await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+    async with async_session() as session:
+        yield session
+
+    #Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+async def redis():
+    yield redis_client
+    await redis_client.flushall()
+    await redis_pool.disconnect()
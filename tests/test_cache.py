@@ -0,0 +1,108 @@
+import asyncio
+import time
+import pytest
+from uuid import uuid4
+from fastapi import HTTPException
+from sqlalchemy import text
+from utils.cache import LOCK_TTL_MS,_fill,cached,error_key,invalidate_post,lock_key,post_key
+
+
+async def test_concurrent_misses_share_one_load(db,redis):
+    calls = []
+
+    async def load(session) -> str:
+        calls.append(session)
+        await asyncio.sleep(0.05)
+        return str(await session.scalar(text("SELECT 42")))
+
+    results = await asyncio.gather(*(cached("cache:test",load) for _ in range(10)))
+
+    assert results == ["42"] * 10
+    assert len(calls) == 1
+    #The loader ran on a session opened for the fill, not on the caller's
+    assert calls[0] is not db
+    assert await redis.get("cache:test") == "42"
+
+
+def slow_failure(error:Exception):
+    async def load(session) -> str:
+        await asyncio.sleep(0.1)
+        raise error
+    return load
+
+
+async def test_waiters_get_lock_holder_http_error_immediately(db,redis):
+    async def never(session) -> str:
+        raise AssertionError("waiter must not load")
+
+    started = time.perf_counter()
+    holder = asyncio.ensure_future(_fill("cache:missing",slow_failure(HTTPException(404,"Post not found")),60))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.ensure_future(_fill("cache:missing",never,60))
+
+    for task in (holder,waiter):
+        with pytest.raises(HTTPException) as error:
+            await task
+        assert error.value.status_code == 404
+
+    assert time.perf_counter() - started < 1
+    assert not await redis.exists("lock:cache:missing")
+    assert await redis.exists(error_key("cache:missing"))
+
+
+async def test_waiters_load_themselves_after_unexpected_error(db,redis):
+    async def fallback(session) -> str:
+        return "fresh"
+
+    holder = asyncio.ensure_future(_fill("cache:broken",slow_failure(RuntimeError("boom")),60))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.ensure_future(_fill("cache:broken",fallback,60))
+
+    with pytest.raises(RuntimeError):
+        await holder
+    assert await asyncio.wait_for(waiter,timeout=1) == "fresh"
+
+
+def gated(value:str):
+    """A loader that blocks until released, to interleave a write with the fill"""
+    started,release = asyncio.Event(),asyncio.Event()
+
+    async def load(session) -> str:
+        started.set()
+        await release.wait()
+        return value
+    return load,started,release
+
+
+async def test_invalidation_during_fill_is_not_overwritten(db,redis):
+    post_id = uuid4()
+    key = post_key(post_id)
+    load,started,release = gated("old")
+
+    fill = asyncio.ensure_future(cached(key,load))
+    await started.wait()
+    await invalidate_post(post_id,listings=False)
+    release.set()
+
+    #The caller still gets what it loaded, but it is not cached
+    assert await fill == "old"
+    assert await redis.get(key) is None
+
+    async def fresh(session) -> str:
+        return "new"
+    assert await cached(key,fresh) == "new"
+    assert await redis.get(key) == "new"
+
+
+async def test_slow_filler_leaves_a_newer_lock_alone(db,redis):
+    load,started,release = gated("slow")
+
+    fill = asyncio.ensure_future(_fill("cache:slow",load,60))
+    await started.wait()
+    #The lock expired and another worker took it over
+    await redis.set(lock_key("cache:slow"),"someone-else",px=LOCK_TTL_MS)
+    release.set()
+
+    assert await fill == "slow"
+    assert await redis.get(lock_key("cache:slow")) == "someone-else"
+    assert await redis.get("cache:slow") is None
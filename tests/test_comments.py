@@ -0,0 +1,94 @@
+import json
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import select,text
+from db import engine
+from models.models import Category,PostFeed,User
+from schemas.comment_schemas import CommentCreate
+from schemas.posts_schemas import PostCreate,PostUpdate
+from schemas.user_schemas import AccountStatusEnum,Roles
+from crud.comment import create_comment,delete_comment
+from crud.post import create_post,update_post
+from crud.post_feed import get_feed_page,get_feed_payload
+from utils.cache import LISTING_GENERATION_KEY
+
+
+@pytest.fixture
+async def setup(db):
+    admin = User(
+        username="admin",email="admin@example.com",phone="0000000000",hash_password="x",
+        role=Roles.admin,status=AccountStatusEnum.active,verified=True
+    )
+    category = Category(name="news")
+    db.add_all([admin,category])
+    await db.commit()
+    post = await create_post(db,admin,None,PostCreate(title="First post",content="Hello",category_id=category.id,tags=[]))
+    return admin,post
+
+
+async def comment_count(db,post_id) -> int:
+    return json.loads(await get_feed_payload(db,post_id))["comment_count"]
+
+
+async def test_comments_update_the_feed_count(db,setup,redis):
+    admin,post = setup
+    generation = int(await redis.get(LISTING_GENERATION_KEY) or 0)
+
+    first = await create_comment(db,post.id,CommentCreate(message="One"),admin)
+    await create_comment(db,post.id,CommentCreate(message="Two"),admin)
+    assert await comment_count(db,post.id) == 2
+    #Listing pages embed the count, so they are invalidated as well
+    assert int(await redis.get(LISTING_GENERATION_KEY)) == generation + 2
+
+    await delete_comment(db,post.id,first.id,admin)
+    assert await comment_count(db,post.id) == 1
+
+    page = json.loads(await get_feed_page(db,0,10))
+    assert [item["comment_count"] for item in page] == [1]
+    #The stored JSON leaves the count to the column
+    assert "comment_count" not in await db.scalar(select(PostFeed.payload).where(PostFeed.id == post.id))
+
+
+async def test_post_edit_keeps_the_count(db,setup):
+    admin,post = setup
+    await create_comment(db,post.id,CommentCreate(message="One"),admin)
+
+    #post.comment_count in this session is stale; the feed row must not take it
+    await update_post(db,post.id,admin,PostUpdate(title="Edited"))
+
+    assert await comment_count(db,post.id) == 1
+
+
+async def test_migration_round_trips(db,setup,load_migration):
+    admin,post = setup
+    await create_comment(db,post.id,CommentCreate(message="One"),admin)
+    comments_api = load_migration("1c6f9e3a7b48_comments_api")
+    feed_count = load_migration("7d2f4a8c5e19_post_feed_comment_count")
+
+    def id_type(connection) -> str:
+        return connection.execute(text(
+            "SELECT data_type FROM information_schema.columns WHERE table_name = 'comments' AND column_name = 'id'"
+        )).scalar_one()
+
+    def round_trip(connection):
+        with Operations.context(MigrationContext.configure(connection)):
+            feed_count.downgrade()
+            payload = connection.execute(select(text("payload")).select_from(text("post_feed"))).scalar_one()
+            assert json.loads(payload)["comment_count"] == 1
+
+            comments_api.downgrade()
+            assert id_type(connection) == "integer"
+            connection.execute(text("INSERT INTO comments (post_id, user_id, message) VALUES (:post, :user, 'Two')"),
+                               {"post":post.id,"user":admin.id})
+
+            comments_api.upgrade()
+            assert id_type(connection) == "uuid"
+            feed_count.upgrade()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(round_trip)
+
+    assert await comment_count(db,post.id) == 2
+    await create_comment(db,post.id,CommentCreate(message="Three"),admin)
+    assert await comment_count(db,post.id) == 3
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import pytest
+from config import settings
+from utils.email import OUTBOX_KEY
+from utils.email_worker import (CONSUMERS_KEY,DEAD_KEY,RETRY_KEY,EmailConsumer,consumer_prefix,
+                                heartbeat_key,processing_key)
+
+
+class FakeSMTP:
+    def __init__(self,fail:bool = False,stop:asyncio.Event | None = None):
+        self.fail = fail
+        self.stop = stop
+        self.sent = []
+
+    async def send(self,message):
+        if self.fail:
+            raise ConnectionResetError("connection lost")
+        self.sent.append(message["To"])
+        if self.stop is not None:
+            self.stop.set()
+
+    async def close(self):
+        pass
+
+
+def job(recipient:str) -> str:
+    return json.dumps({"id":recipient,"recipient":recipient,"subject":"Hi","html":"<p>Hi</p>","attempts":0})
+
+
+async def test_bad_job_does_not_strand_batch(redis):
+    await redis.lpush(OUTBOX_KEY,"not json",job("reader@example.com"))
+    stop = asyncio.Event()
+    consumer = EmailConsumer("test:0")
+    consumer.smtp = FakeSMTP(stop=stop)
+
+    await asyncio.wait_for(consumer.run(stop),timeout=5)
+
+    assert consumer.smtp.sent == ["reader@example.com"]
+    assert await redis.lrange(DEAD_KEY,0,-1) == ["not json"]
+    assert await redis.llen(processing_key("test:0")) == 0
+    assert await redis.llen(OUTBOX_KEY) == 0
+
+
+async def test_failed_send_is_scheduled_for_retry(redis):
+    await redis.lpush(OUTBOX_KEY,job("reader@example.com"))
+    consumer = EmailConsumer("test:0")
+    consumer.smtp = FakeSMTP(fail=True)
+
+    for raw in await consumer.fetch_batch():
+        await consumer.handle(raw)
+
+    retries = await redis.zrange(RETRY_KEY,0,-1)
+    assert [json.loads(raw)["attempts"] for raw in retries] == [1]
+    assert await redis.llen(processing_key("test:0")) == 0
+
+
+async def test_jobs_of_expired_consumer_are_requeued(redis):
+    await redis.sadd(CONSUMERS_KEY,"crashed:1:0","alive:2:0")
+    await redis.lpush(processing_key("crashed:1:0"),job("a@example.com"))
+    await redis.lpush(processing_key("alive:2:0"),job("b@example.com"))
+    await redis.set(heartbeat_key("alive:2:0"),1,ex=60)
+
+    consumer = EmailConsumer("test:0")
+    await consumer.heartbeat()
+    await consumer.reclaim_orphans()
+
+    assert await redis.lrange(OUTBOX_KEY,0,-1) == [job("a@example.com")]
+    assert await redis.llen(processing_key("alive:2:0")) == 1
+    assert await redis.smembers(CONSUMERS_KEY) == {"alive:2:0","test:0"}
+
+
+class SlowSMTP(FakeSMTP):
+    def __init__(self,seconds:float,stop:asyncio.Event):
+        super().__init__(stop=stop)
+        self.seconds = seconds
+
+    async def send(self,message):
+        await asyncio.sleep(self.seconds)
+        await super().send(message)
+
+
+async def test_heartbeat_outlives_slow_send(redis,monkeypatch:pytest.MonkeyPatch):
+    monkeypatch.setattr(settings,"EMAIL_WORKER_HEARTBEAT_SECONDS",1)
+    monkeypatch.setattr(settings,"MAIL_TIMEOUT_SECONDS",0)
+    await redis.lpush(OUTBOX_KEY,job("reader@example.com"))
+    stop = asyncio.Event()
+    consumer = EmailConsumer("test:0")
+    consumer.smtp = SlowSMTP(2.5,stop)
+    run = asyncio.create_task(consumer.run(stop))
+
+    #The send takes longer than the heartbeat TTL, yet no other consumer may reclaim the job
+    await asyncio.sleep(2)
+    assert await redis.exists(heartbeat_key("test:0"))
+    await EmailConsumer("other:0").reclaim_orphans()
+    assert await redis.llen(OUTBOX_KEY) == 0
+
+    await asyncio.wait_for(run,timeout=5)
+    assert consumer.smtp.sent == ["reader@example.com"]
+
+
+def test_consumer_names_are_unique_per_process():
+    assert consumer_prefix().endswith(f":{os.getpid()}")
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime,timedelta,timezone
+from uuid import uuid4
+from config import settings
+from models.models import User
+from schemas.auth_schemas import UserPrincipal
+from schemas.user_schemas import Roles
+from routers.export import export_table
+
+ADMIN = UserPrincipal(id=uuid4(),role=Roles.admin)
+
+
+async def exported_ids(updated_since:datetime) -> list[str]:
+    response = await export_table("users",updated_since,False,ADMIN)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    return [json.loads(line)["id"] for line in body.splitlines()]
+
+
+async def test_offset_aware_updated_since_is_compared_as_utc(db):
+    now = datetime.utcnow()
+    older = User(username="older",email="older@example.com",phone="1",hash_password="x",updated_at=now - timedelta(hours=3))
+    newer = User(username="newer",email="newer@example.com",phone="2",hash_password="x",updated_at=now)
+    db.add_all([older,newer])
+    await db.commit()
+
+    #One hour ago, expressed in UTC+02:00
+    since = (now - timedelta(hours=1)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=2)))
+
+    assert await exported_ids(since) == [str(newer.id)]
+    assert await exported_ids(since.replace(tzinfo=None) - timedelta(hours=2)) == [str(newer.id)]
+
+
+async def test_pulls_overlap_so_late_commits_are_not_lost(db):
+    started_at = datetime.utcnow()
+    #Flushed just before the previous pull started, committed after it
+    late = User(username="late",email="late@example.com",phone="3",hash_password="x",
+                updated_at=started_at - timedelta(seconds=settings.EXPORT_OVERLAP_SECONDS // 2))
+    db.add(late)
+    await db.commit()
+
+    assert await exported_ids(started_at) == [str(late.id)]
@@ -0,0 +1,102 @@
+import os
+from io import BytesIO
+from pathlib import Path
+import pytest
+from PIL import Image
+from utils import images
+from utils.images import ImageWorkerError,InvalidImageError,process_image,render_variants,shutdown_image_pool
+
+
+def saved(tmp_path,image:Image.Image,image_format:str = "PNG") -> str:
+    path = tmp_path/f"upload.{image_format.lower()}"
+    image.save(path,image_format)
+    return str(path)
+
+
+def decoded(content:bytes) -> Image.Image:
+    return Image.open(BytesIO(content))
+
+
+@pytest.mark.parametrize("mode",["P","LA"])
+def test_transparency_is_kept_for_webp(tmp_path,mode):
+    image = Image.new("RGBA",(300,200),(255,0,0,0)).convert(mode)
+    if mode == "P":
+        image.info["transparency"] = 0
+
+    variants = render_variants(saved(tmp_path,image),"webp")
+
+    for content in variants.values():
+        variant = decoded(content)
+        assert variant.mode == "RGBA"
+        assert variant.getpixel((0,0))[3] == 0
+
+
+def test_jpeg_variants_are_rgb(tmp_path):
+    variants = render_variants(saved(tmp_path,Image.new("LA",(300,200))),"jpeg")
+
+    assert {decoded(content).mode for content in variants.values()} == {"RGB"}
+    assert decoded(variants["thumbnail"]).size == (200,133)
+
+
+def test_truncated_image_is_rejected(tmp_path):
+    path = saved(tmp_path,Image.effect_noise((400,400),64))
+    with open(path,"r+b") as file:
+        file.truncate(2000)
+
+    with pytest.raises(InvalidImageError):
+        render_variants(path,"webp")
+
+
+def test_decompression_bomb_is_rejected(tmp_path,monkeypatch):
+    path = saved(tmp_path,Image.new("RGB",(300,300)))
+    monkeypatch.setattr(Image,"MAX_IMAGE_PIXELS",10_000)
+
+    with pytest.raises(InvalidImageError):
+        render_variants(path,"webp")
+
+
+def test_garbage_is_rejected(tmp_path):
+    path = tmp_path/"upload.png"
+    path.write_bytes(b"not an image")
+
+    with pytest.raises(InvalidImageError):
+        render_variants(str(path),"webp")
+
+
+#Run inside the image workers: os._exit kills the worker and breaks the pool
+def crash(path:str,image_format:str) -> dict[str,bytes]:
+    os._exit(1)
+
+
+def crash_once(path:str,image_format:str) -> dict[str,bytes]:
+    flag = Path(path)
+    if not flag.exists():
+        flag.touch()
+        os._exit(1)
+    return {"full":b"ok"}
+
+
+@pytest.fixture
+def image_pool():
+    shutdown_image_pool()
+    yield
+    shutdown_image_pool()
+
+
+async def test_broken_pool_is_replaced_and_retried(tmp_path,monkeypatch,image_pool):
+    monkeypatch.setattr(images,"render_variants",crash_once)
+
+    _,variants = await process_image(tmp_path/"crashed")
+
+    assert variants == {"full":b"ok"}
+
+
+async def test_pool_that_keeps_breaking_is_reported_and_reset(tmp_path,monkeypatch,image_pool):
+    monkeypatch.setattr(images,"render_variants",crash)
+    with pytest.raises(ImageWorkerError):
+        await process_image(tmp_path/"upload")
+
+    #The next upload gets a fresh pool instead of the broken one
+    monkeypatch.setattr(images,"render_variants",crash_once)
+    (tmp_path/"upload").touch()
+    assert (await process_image(tmp_path/"upload"))[1] == {"full":b"ok"}
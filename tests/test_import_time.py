@@ -0,0 +1,23 @@
+from scripts.import_time import profile
+
+#Loaded on first use (utils.lazy.lazy_import or a function-level import), so
+#`import main` must not execute them. Asserting on modules rather than wall
+#time catches a regression without flaking on a loaded machine.
+LAZY_MODULES = (
+    "PIL.Image",
+    "PIL.ImageOps",
+    "aiosmtplib",
+    "jose.jwt",
+    "jinja2.environment",
+    "prometheus_client.metrics",
+    "prometheus_client.exposition",
+    "concurrent.futures.process",
+    "multiprocessing",
+)
+
+
+def test_import_main_defers_heavy_modules():
+    imported = {name.strip() for name,_,_ in profile("main")}
+
+    executed = [module for module in LAZY_MODULES if module in imported]
+    assert executed == [],f"executed by import main: {executed}"
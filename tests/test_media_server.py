@@ -0,0 +1,57 @@
+import gzip
+import pytest
+from starlette.testclient import TestClient
+from utils.media_server import MediaFiles,accepted_encodings
+
+#httpx only decodes br bodies when a brotli package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH = "ab"*32
+
+
+@pytest.fixture
+def client(tmp_path):
+    objects = tmp_path/"objects"/"ab"
+    objects.mkdir(parents=True)
+    (objects/f"{HASH}.txt").write_bytes(b"plain body")
+    (objects/f"{HASH}.txt.br").write_bytes(brotli.compress(b"plain body") if brotli else b"brotli body")
+    (objects/f"{HASH}.txt.gz").write_bytes(gzip.compress(b"plain body"))
+    return TestClient(MediaFiles(tmp_path))
+
+
+def get(client,**headers):
+    return client.get(f"/objects/ab/{HASH}.txt",headers=headers)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, br;q=0, *;q=0.5, deflate;q=oops") == {
+        "gzip":1.0,"br":0.0,"*":0.5,"deflate":0.0,
+    }
+
+
+@pytest.mark.parametrize("accept_encoding,encoding",[
+    ("gzip, br","br"),
+    ("gzip, br;q=0","gzip"),
+    ("br;q=0.5, gzip","gzip"),
+    ("identity",None),
+    ("*;q=0.1, br;q=0","gzip"),
+])
+def test_encoding_negotiation(client,accept_encoding,encoding):
+    response = get(client,**{"accept-encoding":accept_encoding})
+
+    assert response.headers.get("content-encoding") == encoding
+    suffix = f"-{encoding}" if encoding else ""
+    assert response.headers["etag"] == f'"{HASH}{suffix}"'
+
+
+def test_if_none_match_is_per_representation(client):
+    brotli = get(client,**{"accept-encoding":"br"})
+
+    assert get(client,**{"accept-encoding":"br","if-none-match":brotli.headers["etag"]}).status_code == 304
+    #The identity ETag does not validate the brotli body and vice versa
+    assert get(client,**{"accept-encoding":"br","if-none-match":f'"{HASH}"'}).status_code == 200
+    assert get(client,**{"accept-encoding":"identity","if-none-match":brotli.headers["etag"]}).status_code == 200
+    assert get(client,**{"accept-encoding":"identity","if-none-match":f'"{HASH}"'}).status_code == 304
@@ -0,0 +1,63 @@
+from datetime import datetime,timedelta
+from io import BytesIO
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import select,update
+from config import settings
+from db import async_session
+from models.models import MediaObject
+from utils.media_store import collect_garbage,release_references,url_to_path,write_object,write_object_stream
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path,monkeypatch):
+    monkeypatch.setattr(settings,"MEDIA_ROOT",tmp_path)
+    return tmp_path
+
+
+async def expire(db,url:str):
+    """Drop the reference and age the row past the GC grace period"""
+    await release_references(db,[url])
+    await db.execute(
+        update(MediaObject)
+        .values(updated_at=datetime.utcnow() - timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS + 60))
+    )
+    await db.commit()
+
+
+async def test_duplicate_writes_share_one_blob(db):
+    _,url,size = await write_object(db,b"same bytes",".bin")
+    _,second_url,_ = await write_object_stream(db,UploadFile(BytesIO(b"same bytes")),".bin")
+    await db.commit()
+
+    assert second_url == url
+    assert url_to_path(url).read_bytes() == b"same bytes"
+    row = await db.scalar(select(MediaObject))
+    assert (row.ref_count,row.size) == (2,size)
+
+
+async def test_gc_removes_unreferenced_blobs(db):
+    _,url,_ = await write_object(db,b"orphan",".bin")
+    await db.commit()
+    await expire(db,url)
+
+    assert await collect_garbage(db) == 1
+    assert not url_to_path(url).exists()
+    assert await db.scalar(select(MediaObject)) is None
+
+
+async def test_gc_skips_blob_being_referenced(db):
+    _,url,_ = await write_object(db,b"reused",".bin")
+    await db.commit()
+    await expire(db,url)
+
+    #A writer re-references the blob and has not committed yet
+    async with async_session() as writer:
+        await write_object(writer,b"reused",".bin")
+
+        assert await collect_garbage(db) == 0
+        await writer.commit()
+
+    assert url_to_path(url).exists()
+    row = await db.scalar(select(MediaObject).execution_options(populate_existing=True))
+    assert row.ref_count == 1
@@ -0,0 +1,16 @@
+import db  # noqa: F401  instruments the pools
+from prometheus_client import REGISTRY,generate_latest
+from utils.metrics import metrics_response
+
+
+def test_instrumenting_pools_leaves_the_hash_pool_alone():
+    #Registered by main for the API process only
+    assert b"password_hash_pool" not in generate_latest(REGISTRY)
+
+
+def test_multiprocess_scrape_includes_process_collectors(tmp_path,monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR",str(tmp_path))
+
+    body = metrics_response().body.decode()
+
+    assert 'db_pool_size{pool="primary"}' in body
@@ -0,0 +1,65 @@
+import asyncio
+from config import settings
+from utils.otp import OTPState,consume_reset_token,issue_otp,otp_keys,verify_otp
+
+EMAIL = "reader@example.com"
+RACERS = 20
+
+
+async def test_concurrent_verify_succeeds_once():
+    assert await issue_otp(EMAIL,"123456") == 0
+
+    results = await asyncio.gather(*(verify_otp(EMAIL,"123456") for _ in range(RACERS)))
+
+    winners = [result for result in results if result[0] == OTPState.ok]
+    assert len(winners) == 1
+    assert winners[0][2] is not None
+    #The code is gone for everyone else, which does not count as a wrong guess
+    assert all(result == (OTPState.invalid,0,None) for result in results if result[0] != OTPState.ok)
+
+
+async def test_concurrent_token_redemption_succeeds_once():
+    await issue_otp(EMAIL,"123456")
+    _,_,token = await verify_otp(EMAIL,"123456")
+
+    results = await asyncio.gather(*(consume_reset_token(EMAIL,token) for _ in range(RACERS)))
+
+    assert results.count(True) == 1
+
+
+async def test_wrong_guesses_lock_out(redis):
+    await issue_otp(EMAIL,"123456")
+
+    for attempt in range(1,settings.OTP_MAX_ATTEMPTS):
+        assert await verify_otp(EMAIL,"000000") == (OTPState.invalid,settings.OTP_MAX_ATTEMPTS - attempt,None)
+
+    state,seconds,token = await verify_otp(EMAIL,"000000")
+    assert (state,seconds,token) == (OTPState.locked,settings.OTP_LOCKOUT_SECONDS,None)
+
+    _,lock_key,_ = otp_keys(EMAIL)
+    assert 0 < await redis.ttl(lock_key) <= settings.OTP_LOCKOUT_SECONDS
+
+    #The right code no longer helps while locked
+    state,_,token = await verify_otp(EMAIL,"123456")
+    assert state == OTPState.locked and token is None
+
+
+async def test_concurrent_wrong_guesses_cannot_exceed_limit():
+    await issue_otp(EMAIL,"123456")
+
+    results = await asyncio.gather(*(verify_otp(EMAIL,f"{guess:06d}") for guess in range(RACERS)))
+
+    invalid = [result for result in results if result[0] == OTPState.invalid and result[1] > 0]
+    assert len(invalid) == settings.OTP_MAX_ATTEMPTS - 1
+    assert (await verify_otp(EMAIL,"123456"))[0] == OTPState.locked
+
+
+async def test_issue_refused_while_locked(redis):
+    _,lock_key,_ = otp_keys(EMAIL)
+    await redis.set(lock_key,1,ex=settings.OTP_LOCKOUT_SECONDS)
+
+    remaining = await issue_otp(EMAIL,"654321")
+
+    assert 0 < remaining <= settings.OTP_LOCKOUT_SECONDS
+    otp_key,_,_ = otp_keys(EMAIL)
+    assert not await redis.exists(otp_key)
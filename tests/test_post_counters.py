@@ -0,0 +1,114 @@
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import delete,select,text,update
+from db import engine
+from models.models import Category,Post,Tag,User,post_tags
+from schemas.posts_schemas import PostStatusEnum
+from schemas.user_schemas import Roles
+from crud.post import bulk_create_posts
+
+#What the triggers should have produced, recomputed from scratch
+EXPECTED_CATEGORIES = """
+SELECT c.id,
+       count(p.id) AS total,
+       count(p.id) FILTER (WHERE p.status = 'published') AS published
+FROM categories c LEFT JOIN posts p ON p.category_id = c.id
+GROUP BY c.id
+"""
+
+EXPECTED_TAGS = """
+SELECT t.id,
+       count(p.id) AS total,
+       count(p.id) FILTER (WHERE p.status = 'published') AS published
+FROM tags t LEFT JOIN post_tags pt ON pt.tag_id = t.id LEFT JOIN posts p ON p.id = pt.post_id
+GROUP BY t.id
+"""
+
+
+async def assert_counters_match(db):
+    for model,query in ((Category,EXPECTED_CATEGORIES),(Tag,EXPECTED_TAGS)):
+        expected = {row.id:(row.total,row.published) for row in await db.execute(text(query))}
+        stored = {
+            row.id:(row.total_post_count,row.published_post_count)
+            for row in await db.execute(select(model.id,model.total_post_count,model.published_post_count))
+        }
+        assert stored == expected
+
+
+@pytest.fixture
+async def setup(db):
+    admin = User(username="admin",email="admin@example.com",phone="0000000000",hash_password="x",role=Roles.admin)
+    categories = [Category(name=f"category {i}") for i in range(3)]
+    tags = [Tag(name=f"tag {i}") for i in range(4)]
+    db.add_all([admin,*categories,*tags])
+    await db.commit()
+    return admin,categories,tags
+
+
+def bulk_items(categories,tags,count:int) -> list[tuple[int,dict]]:
+    return [
+        (i,{
+            "title":f"Post {i}",
+            "content":"Body",
+            "category_id":str(categories[i % len(categories)].id),
+            "tags":[str(tags[i % len(tags)].id),str(tags[(i + 1) % len(tags)].id)],
+        })
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count",[10,600])
+async def test_bulk_import_applies_grouped_deltas(db,setup,count):
+    admin,categories,tags = setup
+
+    report = await bulk_create_posts(db,admin,bulk_items(categories,tags,count))
+
+    assert report.created == count
+    await assert_counters_match(db)
+
+
+async def test_status_category_and_delete_changes(db,setup):
+    admin,categories,tags = setup
+    await bulk_create_posts(db,admin,bulk_items(categories,tags,30))
+
+    post_ids = list(await db.scalars(select(Post.id).order_by(Post.id)))
+
+    #One statement touching many posts: mixed status changes
+    await db.execute(update(Post).where(Post.id.in_(post_ids[:10])).values(status=PostStatusEnum.archived))
+    await assert_counters_match(db)
+
+    await db.execute(update(Post).where(Post.id.in_(post_ids[:5])).values(status=PostStatusEnum.published))
+    await db.execute(update(Post).where(Post.id.in_(post_ids[5:20])).values(category_id=categories[0].id))
+    await db.execute(update(Post).where(Post.id.in_(post_ids[20:25])).values(title="Only the title changed"))
+    await assert_counters_match(db)
+
+    await db.execute(delete(post_tags).where(post_tags.c.post_id.in_(post_ids[:12])))
+    await db.execute(delete(Post).where(Post.id.in_(post_ids[:12])))
+    await assert_counters_match(db)
+    await db.commit()
+
+
+async def test_counter_triggers_are_statement_level(db):
+    #tgtype bit 0 is set for FOR EACH ROW triggers
+    result = await db.execute(text(
+        "SELECT tgname FROM pg_trigger "
+        "WHERE tgrelid IN ('posts'::regclass, 'post_tags'::regclass) AND NOT tgisinternal AND tgtype & 1 = 1"
+    ))
+    assert result.scalars().all() == []
+
+
+async def test_migration_round_trip(db,setup,load_migration):
+    admin,categories,tags = setup
+    migration = load_migration("4b8e1f6a2c73_statement_level_counter_triggers")
+
+    def round_trip(connection):
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.downgrade()
+            migration.upgrade()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(round_trip)
+
+    await bulk_create_posts(db,admin,bulk_items(categories,tags,5))
+    await assert_counters_match(db)
@@ -0,0 +1,41 @@
+import pytest
+from uuid import uuid4
+from schemas.auth_schemas import UserPrincipal
+from schemas.user_schemas import AccountStatusEnum,Roles
+from utils import principal_cache
+from utils.principal_cache import bump_user_version,cache_principal,get_cached_principal,principal_key
+
+
+@pytest.fixture(autouse=True)
+def empty_local_cache():
+    principal_cache._local.clear()
+    yield
+    principal_cache._local.clear()
+
+
+def principal(user_id,account_status=AccountStatusEnum.active) -> UserPrincipal:
+    return UserPrincipal(id=user_id,role=Roles.user,status=account_status)
+
+
+async def test_miss_then_hit():
+    user_id = uuid4()
+    cached,version = await get_cached_principal(user_id)
+    assert cached is None and version == "0"
+
+    assert await cache_principal(principal(user_id),version)
+    principal_cache._local.clear()
+
+    cached,_ = await get_cached_principal(user_id)
+    assert cached == principal(user_id)
+
+
+async def test_bump_during_load_is_not_overwritten(redis):
+    user_id = uuid4()
+    _,version = await get_cached_principal(user_id)
+
+    #The user is suspended while the request that missed is still reading the old row
+    await bump_user_version(user_id)
+
+    assert not await cache_principal(principal(user_id),version)
+    assert await redis.get(principal_key(user_id)) is None
+    assert await get_cached_principal(user_id) == (None,"1")
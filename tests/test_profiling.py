@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from db import engine
+from utils.profiling import RequestProfile,current_profile,instrument_engine,stop_observing,_profile_statement
+from utils.query_counter import count_queries
+
+
+@pytest.fixture
+def profiled(database):
+    instrument_engine(engine)
+    yield
+    stop_observing(engine,_profile_statement)
+
+
+async def test_profile_and_counter_share_one_listener(db,profiled):
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    try:
+        with count_queries(engine) as counter:
+            listeners = len(engine.sync_engine.dispatch.before_cursor_execute)
+            await db.execute(text("SELECT 1"))
+    finally:
+        current_profile.reset(token)
+
+    assert listeners == 1
+    assert counter.count == profile.count == 1
+
+
+async def test_failed_statements_are_recorded_without_leaking(db,profiled):
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    try:
+        with count_queries(engine) as counter:
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    await db.execute(text("SELECT 1/0"))
+                await db.rollback()
+    finally:
+        current_profile.reset(token)
+
+    assert counter.count == profile.count == 3
+    connection = await db.connection()
+    assert "query_start" not in connection.sync_connection.info
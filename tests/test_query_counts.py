@@ -0,0 +1,129 @@
+"""
+Statement budgets of the write paths. Counter triggers run inside Postgres and
+are not counted; a change in these numbers means a round trip was added or removed.
+"""
+import pytest
+from db import engine
+from models.models import Category,Post,Tag,User
+from schemas.comment_schemas import CommentCreate
+from schemas.category_schemas import CategoryCreate,CategoryUpdate
+from schemas.posts_schemas import PostCreate,PostStatusEnum,PostStatusUpdate,PostUpdate
+from schemas.tag_schemas import TagCreate
+from schemas.user_schemas import AccountStatusEnum,Roles,UserCreate,UserUpdate
+from crud.comment import create_comment,delete_comment
+from crud.category import create_category,update_category
+from crud.post import create_post,update_post
+from crud.tag import create_tags,delete_tags
+from crud.user import create_user,update_user
+from routers.post import update_post_status
+from utils.query_counter import count_queries
+
+
+@pytest.fixture
+async def admin(db):
+    user = User(
+        username="admin",email="admin@example.com",phone="0000000000",hash_password="x",
+        role=Roles.admin,status=AccountStatusEnum.active,verified=True
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+async def category(db):
+    category = Category(name="news")
+    db.add(category)
+    await db.commit()
+    return category
+
+
+@pytest.fixture
+async def tag(db):
+    tag = Tag(name="python")
+    db.add(tag)
+    await db.commit()
+    return tag
+
+
+@pytest.fixture
+async def post(db,admin,category,tag):
+    return await create_post(db,admin,None,PostCreate(
+        title="First post",content="Hello",category_id=category.id,tags=[tag.id]
+    ))
+
+
+async def test_create_post(db,admin,category,tag):
+    data = PostCreate(title="First post",content="Hello",category_id=category.id,tags=[tag.id])
+
+    with count_queries(engine) as counter:
+        new_post = await create_post(db,admin,None,data)
+
+    #tag lookup, INSERT posts, INSERT post_tags, feed upsert
+    assert counter.count == 4,counter.statements
+    assert new_post.status == PostStatusEnum.published
+
+
+async def test_update_post(db,admin,post,tag):
+    with count_queries(engine) as counter:
+        await update_post(db,post.id,admin,PostUpdate(title="Edited title"))
+
+    #SELECT post, selectin tags, UPDATE posts, feed upsert
+    assert counter.count == 4,counter.statements
+
+
+async def test_update_post_status(db,admin,post):
+    with count_queries(engine) as counter:
+        updated = await update_post_status(post.id,PostStatusUpdate(status=PostStatusEnum.archived),db,admin)
+
+    #SELECT post, selectin tags, UPDATE posts, feed delete
+    assert counter.count == 4,counter.statements
+    assert updated.status == PostStatusEnum.archived
+
+
+async def test_category_writes(db):
+    with count_queries(engine) as counter:
+        category = await create_category(db,CategoryCreate(name="science"))
+    assert counter.count == 1,counter.statements
+
+    with count_queries(engine) as counter:
+        await update_category(db,category.id,CategoryUpdate(description="Lab notes"))
+    #SELECT, UPDATE
+    assert counter.count == 2,counter.statements
+
+
+async def test_tag_writes(db,admin):
+    with count_queries(engine) as counter:
+        tag = await create_tags(db,TagCreate(name="rust"),admin)
+    assert counter.count == 1,counter.statements
+
+    with count_queries(engine) as counter:
+        await delete_tags(db,tag.id)
+    #SELECT, post_tags collection load for the secondary cleanup, DELETE
+    assert counter.count == 3,counter.statements
+
+
+async def test_user_writes(db,admin):
+    data = UserCreate(username="reader",email="reader@example.com",phone="12345678",password="long-password")
+
+    with count_queries(engine) as counter:
+        user = await create_user(db,data)
+    #email lookup, INSERT
+    assert counter.count == 2,counter.statements
+
+    with count_queries(engine) as counter:
+        await update_user(db,user.id,UserUpdate(username="reader2"),admin)
+    #identity-map hit for the user, UPDATE
+    assert counter.count == 1,counter.statements
+
+
+async def test_comment_writes(db,admin,post):
+    with count_queries(engine) as counter:
+        comment = await create_comment(db,post.id,CommentCreate(message="Nice"),admin)
+    #username and visibility check, INSERT; the feed count is bumped by the trigger
+    assert counter.count == 2,counter.statements
+
+    with count_queries(engine) as counter:
+        await delete_comment(db,post.id,comment.id,admin)
+    #SELECT, DELETE
+    assert counter.count == 2,counter.statements
@@ -0,0 +1,29 @@
+from utils.cache import error_key,invalidate_post,post_key
+from utils.redis import delete_many,get_many,store_many
+from uuid import uuid4
+
+
+async def test_batch_helpers(redis):
+    await store_many({"a":"1","b":"2"},60)
+
+    assert await get_many(["a","missing","b"]) == ["1",None,"2"]
+    assert 0 < await redis.ttl("a") <= 60 and 0 < await redis.ttl("b") <= 60
+
+    assert await delete_many(["a","b","missing"]) == 2
+    assert await get_many(["a","b"]) == [None,None]
+
+
+async def test_batch_helpers_skip_empty_input(redis):
+    await store_many({},60)
+    assert await get_many([]) == []
+    assert await delete_many([]) == 0
+
+
+async def test_invalidate_post_drops_the_error_marker(redis):
+    post_id = uuid4()
+    key = post_key(post_id)
+    await store_many({key:"{}",error_key(key):'{"status_code":404,"detail":"Post not found"}'},60)
+
+    await invalidate_post(post_id,listings=False)
+
+    assert await get_many([key,error_key(key)]) == [None,None]
@@ -0,0 +1,24 @@
+from models.models import Category,Post,User
+from schemas.posts_schemas import PostStatusEnum
+from schemas.user_schemas import Roles
+from crud.post import search_posts
+
+
+async def test_search_snippet_escapes_post_html(db):
+    admin = User(username="admin",email="admin@example.com",phone="0000000000",hash_password="x",role=Roles.admin)
+    category = Category(name="news")
+    db.add_all([admin,category])
+    await db.flush()
+    db.add(Post(
+        title="Widgets",
+        description="About widgets",
+        content="Widgets & gadgets <img src=x onerror=alert(1)",
+        status=PostStatusEnum.published,
+        author_id=admin.id,
+        category_id=category.id
+    ))
+    await db.commit()
+
+    hits,_ = await search_posts(db,"widgets")
+
+    assert [hit.snippet for hit in hits] == ["<mark>Widgets</mark> &amp; gadgets &lt;img src=x onerror=alert"]
@@ -0,0 +1,30 @@
+import json
+from sqlalchemy import event
+from config import settings
+from db import build_engine
+from utils.cache import listing_key
+from utils.warmup import WARM_LISTING_LIMIT,warm_caches,warm_db_pool
+
+
+async def test_warm_caches_fills_first_listing_pages(db,redis):
+    await warm_caches()
+
+    assert json.loads(await redis.get(await listing_key(0,WARM_LISTING_LIMIT,None))) == []
+    assert json.loads(await redis.get(await listing_key(0,WARM_LISTING_LIMIT,""))) == {"items":[],"next_cursor":None}
+
+
+async def test_warm_db_pool_is_capped_by_pool_size(db,monkeypatch):
+    monkeypatch.setattr(settings,"DB_POOL_SIZE",2)
+    monkeypatch.setattr(settings,"DB_MAX_OVERFLOW",1)
+    monkeypatch.setattr(settings,"DB_POOL_TIMEOUT",1)
+    small_engine = build_engine(settings.DATABASE_URL)
+    connects = []
+    event.listen(small_engine.sync_engine,"connect",lambda *args:connects.append(1))
+
+    try:
+        #Overflow connections would be opened only to be closed on return
+        await warm_db_pool(small_engine,50)
+        assert len(connects) == 2
+        assert small_engine.sync_engine.pool.checkedin() == 2
+    finally:
+        await small_engine.dispose()
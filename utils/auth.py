@@ -1,6 +1,6 @@
 from fastapi import Depends,HTTPException,status,Header
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt,JWTError
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models.models import User
@@ -8,10 +8,16 @@ from uuid import UUID
 from typing import Optional
 from datetime import datetime
 from schemas.user_schemas import AccountStatusEnum
+from schemas.auth_schemas import UserPrincipal
+from utils.principal_cache import get_cached_principal,cache_principal
 
 from db import get_db
 from crud.user import get_user_by_id
 from config import settings
+from utils.lazy import lazy_import
+
+#jose.jwt pulls in the cryptography backends, ~100 ms of import time
+jwt = lazy_import("jose.jwt")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -35,10 +41,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 #     return user
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+def decode_user_id(token:str) -> UUID:
+    """Extract the user id from a JWT or raise 401"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -54,36 +58,101 @@ async def get_current_user(
         user_id: str | None = payload.get("sub")
         if user_id is None:
             raise credentials_exception
+        return UUID(user_id)
 
-    except JWTError:
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    user = await db.get(User, str(UUID(user_id)))
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    user = await db.get(User, decode_user_id(token))
 
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     return user
 
 
-# Verify JWT Token and ensure the user is active 
-async def get_current_active_user(current_user:User = Depends(get_current_user)) -> User:
-    """
-    Verify the user is active (not suspended or inactive)
-    """
-    if current_user.status == AccountStatusEnum.suspended:
+# Resolve id, role and status from cache, falling back to the DB on a miss
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> UserPrincipal:
+    user_id = decode_user_id(token)
+
+    #The version is read before the user row, so a concurrent bump is detected on write
+    version = None
+    if settings.AUTH_CACHE_ENABLED:
+        principal,version = await get_cached_principal(user_id)
+        if principal is not None:
+            return principal
+
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    principal = UserPrincipal.model_validate(user)
+    if version is not None:
+        await cache_principal(principal,version)
+
+    return principal
+
+
+def ensure_active(account_status: AccountStatusEnum | None):
+    if account_status == AccountStatusEnum.suspended:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account is suspended. Please contact support."
         )
     
-    elif current_user.status == AccountStatusEnum.inactive:
+    elif account_status == AccountStatusEnum.inactive:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account is inactive. Please active your account."
         )
+
+
+# Verify JWT Token and ensure the principal is active, without loading the user
+async def get_current_active_principal(
+    principal: UserPrincipal = Depends(get_current_principal)
+) -> UserPrincipal:
+    """
+    Verify the user is active (not suspended or inactive)
+    Use this when only id and role are needed
+    """
+    ensure_active(principal.status)
+    return principal
+
+
+# Verify JWT Token and ensure the user is active 
+async def get_current_active_user(
+    principal: UserPrincipal = Depends(get_current_active_principal),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Verify the user is active (not suspended or inactive)
+    Status is checked against the cached principal before the User row is loaded
+    """
+    user = await db.get(User, principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
         
-    return current_user
+    return user
 
 
 # Helper function to check token expiration
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import random
+import secrets
+from typing import Awaitable,Callable
+from uuid import UUID
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from db import async_session
+from utils.redis import redis_client,delete_many,get_many,store_many
+
+logger = logging.getLogger(__name__)
+
+LISTING_GENERATION_KEY = "cache:posts:public:gen"
+LOCK_TTL_MS = 5000
+LOCK_POLL_INTERVAL = 0.05
+#How long waiters see a failed fill; long enough to wake every poller
+ERROR_MARKER_TTL_MS = 1000
+
+#The fill lock holds a per-fill token and doubles as a fence: the value (or error
+#marker) is only written while the lock is still ours. invalidate_post deletes
+#the lock, so a fill that started before an invalidation never stores its result.
+STORE_IF_LOCKED_LUA = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+redis.call('DEL', KEYS[2])
+return 1
+"""
+
+store_if_locked = redis_client.register_script(STORE_IF_LOCKED_LUA)
+
+#In-process single flight: one loader per key per worker
+_inflight:dict[str,asyncio.Task] = {}
+
+
+def jittered_ttl(ttl:int) -> int:
+    """Spread expiry by up to 10% so hot keys do not all expire together"""
+    return ttl + random.randint(0,max(1,ttl // 10))
+
+
+#Loaders receive their own session: the fill is shared by every waiting request,
+#so it must not borrow (or outlive) the session of whichever request started it
+Loader = Callable[[AsyncSession],Awaitable[str]]
+
+
+def error_key(key:str) -> str:
+    return f"error:{key}"
+
+
+def lock_key(key:str) -> str:
+    return f"lock:{key}"
+
+
+def post_key(post_id:UUID) -> str:
+    return f"cache:post:{post_id}"
+
+
+async def listing_key(skip:int,limit:int,cursor:str | None) -> str:
+    """
+    Listing keys embed a generation counter so a single INCR drops every page
+    """
+    try:
+        generation = await redis_client.get(LISTING_GENERATION_KEY) or "0"
+    except RedisError:
+        generation = "0"
+    mode = "-" if cursor is None else cursor
+    return f"cache:posts:public:{generation}:{skip}:{limit}:{mode}"
+
+
+async def _load(loader:Loader) -> str:
+    #From the primary: a refill right after an invalidation must not cache replica lag
+    async with async_session() as db:
+        return await loader(db)
+
+
+def _error_marker(error:Exception) -> str:
+    """HTTP errors (e.g. 404) are replayed to waiters, anything else makes them load themselves"""
+    if isinstance(error,HTTPException):
+        return json.dumps({"status_code":error.status_code,"detail":error.detail})
+    return "{}"
+
+
+async def _fill(key:str,loader:Loader,ttl:int) -> str:
+    token = secrets.token_hex(16)
+    if await redis_client.set(lock_key(key),token,nx=True,px=LOCK_TTL_MS):
+        try:
+            value = await _load(loader)
+        except Exception as e:
+            try:
+                await store_if_locked(keys=[error_key(key),lock_key(key)],args=[token,_error_marker(e),ERROR_MARKER_TTL_MS])
+            except RedisError as redis_error:
+                logger.warning(f"Could not release cache lock for {key}: {redis_error}")
+            raise
+
+        await store_if_locked(keys=[key,lock_key(key)],args=[token,value,jittered_ttl(ttl) * 1000])
+        return value
+
+    #Another worker is recomputing, wait for it instead of hitting the DB
+    for _ in range(int(LOCK_TTL_MS / 1000 / LOCK_POLL_INTERVAL)):
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value,error,lock = await get_many([key,error_key(key),lock_key(key)])
+        if value is not None:
+            return value
+        if error is not None:
+            error = json.loads(error)
+            if "status_code" in error:
+                raise HTTPException(status_code=error["status_code"],detail=error["detail"])
+            break
+        #Invalidated or expired mid-fill: nothing is coming
+        if lock is None:
+            break
+
+    return await _load(loader)
+
+
+def _forget(key:str,task:asyncio.Task):
+    #An invalidation may already have replaced the entry with a newer fill
+    if _inflight.get(key) is task:
+        del _inflight[key]
+
+
+async def cached(key:str,loader:Loader,ttl:int | None = None) -> str:
+    """
+    Read-through cache for serialized payloads.
+    Concurrent misses share a single recomputation, both inside this worker
+    and across workers through a short Redis lock. `loader` is called with a
+    primary session opened for the fill.
+    """
+    ttl = ttl or settings.POST_CACHE_TTL
+    try:
+        value = await redis_client.get(key)
+        if value is not None:
+            return value
+    except RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return await _load(loader)
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fill(key,loader,ttl))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget(key,done))
+
+    try:
+        return await asyncio.shield(task)
+    except RedisError as e:
+        logger.warning(f"Cache fill failed for {key}: {e}")
+        return await _load(loader)
+
+
+async def prime(loaders:dict[str,Loader],ttl:int | None = None):
+    """
+    Load several entries on one session and store them in one round trip,
+    e.g. at startup. Without the fill lock a concurrent invalidation is not
+    seen, so only use it for keys that embed a generation (listing keys).
+    """
+    ttl = ttl or settings.POST_CACHE_TTL
+    async with async_session() as db:
+        values = {key:await loader(db) for key,loader in loaders.items()}
+    try:
+        await store_many(values,jittered_ttl(ttl))
+    except RedisError as e:
+        logger.warning(f"Cache prime failed: {e}")
+
+
+async def invalidate_post(post_id:UUID,listings:bool = True):
+    """
+    Drop the cached post (and a replayable error such as a 404) and, when it
+    affects the public feed, every listing page
+    """
+    key = post_key(post_id)
+    #Requests arriving from now on must not join a fill that may predate the write
+    _inflight.pop(key,None)
+    try:
+        await delete_many([key,error_key(key),lock_key(key)])
+    except RedisError as e:
+        logger.warning(f"Cache invalidation failed for post {post_id}: {e}")
+    if listings:
+        await invalidate_listings()
+
+
+async def invalidate_listings():
+    """Drop every cached listing page, e.g. after a bulk import"""
+    try:
+        await redis_client.incr(LISTING_GENERATION_KEY)
+    except RedisError as e:
+        logger.warning(f"Listing cache invalidation failed: {e}")
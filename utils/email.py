@@ -1,15 +1,22 @@
-import aiosmtplib
 from email.message import EmailMessage
 from config import settings
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
+from uuid import uuid4
+from utils.redis import redis_client
+from utils.metrics import track_smtp_send
+from utils.lazy import lazy_import
+import json
+import time
 
-async def send_email_smtp_async(
-    recipient: str,
-    subject: str,
-    html_content: str
-):
+aiosmtplib = lazy_import("aiosmtplib")
+#~100 ms of import time; templates are compiled by the lifespan, after import
+jinja2 = lazy_import("jinja2")
+
+OUTBOX_KEY = "email:outbox"
+
+
+def build_email_message(recipient: str, subject: str, html_content: str) -> EmailMessage:
     message = EmailMessage()
     message["From"] = settings.MAIL_FROM
     message["To"] = recipient
@@ -17,27 +24,107 @@ async def send_email_smtp_async(
 
     message.set_content("This email requires HTML support.")
     message.add_alternative(html_content, subtype="html")
+    return message
 
-    await aiosmtplib.send(
-        message,
-        hostname=settings.MAIL_SERVER,
-        port=settings.MAIL_PORT,
-        username=settings.MAIL_USERNAME,
-        password=settings.MAIL_PASSWORD,
-        start_tls=True
-    )
+
+async def send_email_smtp_async(
+    recipient: str,
+    subject: str,
+    html_content: str
+):
+    message = build_email_message(recipient, subject, html_content)
+
+    with track_smtp_send():
+        await aiosmtplib.send(
+            message,
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME or None,
+            password=settings.MAIL_PASSWORD or None,
+            start_tls=settings.MAIL_STARTTLS
+        )
+
+
+async def enqueue_email(
+    recipient: str,
+    subject: str,
+    html_content: str
+):
+    """
+    Push an email onto the Redis outbox; utils.email_worker delivers it
+    """
+    job = {
+        "id": uuid4().hex,
+        "recipient": recipient,
+        "subject": subject,
+        "html": html_content,
+        "attempts": 0,
+    }
+    await redis_client.lpush(OUTBOX_KEY, json.dumps(job))
 
 BASE_DIR = Path(__file__).resolve().parent  # utils/
+TEMPLATE_DIR = BASE_DIR / "templates"
+
+
+def build_template_env(enable_async: bool = False) -> "jinja2.Environment":
+    bytecode_cache = None
+    if settings.EMAIL_TEMPLATE_CACHE_DIR:
+        settings.EMAIL_TEMPLATE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(str(settings.EMAIL_TEMPLATE_CACHE_DIR))
+
+    template_env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=jinja2.select_autoescape(["html", "xml"]),
+        enable_async=enable_async,
+        auto_reload=False,
+        bytecode_cache=bytecode_cache,
+    )
+    template_env.globals["app_name"] = "My app"
+    return template_env
+
+
+#Sync and async environments, built on first use
+_envs: dict[bool, "jinja2.Environment"] = {}
+
+
+def template_env(enable_async: bool = False) -> "jinja2.Environment":
+    if enable_async not in _envs:
+        _envs[enable_async] = build_template_env(enable_async)
+    return _envs[enable_async]
+
+
+#Compiled templates keyed by name, filled by load_email_templates
+templates: dict[str, "jinja2.Template"] = {}
+async_templates: dict[str, "jinja2.Template"] = {}
+
+_year = {"value": 0, "until": 0.0}
+
+
+def current_year() -> int:
+    """Current UTC year, recomputed only when the year rolls over"""
+    if time.time() >= _year["until"]:
+        now = datetime.now(timezone.utc)
+        _year["value"] = now.year
+        _year["until"] = datetime(now.year + 1, 1, 1, tzinfo=timezone.utc).timestamp()
+    return _year["value"]
+
+
+def load_email_templates():
+    """Compile every email template up front, called once at startup"""
+    for name in template_env().list_templates(extensions=["html"]):
+        templates[name] = template_env().get_template(name)
+        async_templates[name] = template_env(enable_async=True).get_template(name)
 
-env = Environment(
-    loader=FileSystemLoader(BASE_DIR / "templates"),
-    autoescape=select_autoescape(["html", "xml"]),
-)
 
 def render_email_template(template_name: str, context: dict) -> str:
-    template = env.get_template(template_name)
-    context.update({
-        "app_name": "My app",
-        "year": datetime.utcnow().year,
-    })
-    return template.render(**context)
+    template = templates.get(template_name)
+    if template is None:
+        template = templates[template_name] = template_env().get_template(template_name)
+    return template.render(context, year=current_year())
+
+
+async def render_email_template_async(template_name: str, context: dict) -> str:
+    template = async_templates.get(template_name)
+    if template is None:
+        template = async_templates[template_name] = template_env(enable_async=True).get_template(template_name)
+    return await template.render_async(context, year=current_year())
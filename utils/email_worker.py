@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+from config import settings
+from utils.redis import redis_client
+from utils.email import OUTBOX_KEY,build_email_message
+from utils.metrics import track_smtp_send
+from utils.lazy import lazy_import
+
+aiosmtplib = lazy_import("aiosmtplib")
+
+logger = logging.getLogger(__name__)
+
+RETRY_KEY = "email:retry"
+DEAD_KEY = "email:dead"
+CONSUMERS_KEY = "email:consumers"
+
+
+def processing_key(consumer:str) -> str:
+    return f"email:processing:{consumer}"
+
+
+def heartbeat_key(consumer:str) -> str:
+    return f"email:heartbeat:{consumer}"
+
+
+def heartbeat_ttl() -> int:
+    """Well above the worst case for one send: a connect and a send, then a reconnect and a resend"""
+    return max(settings.EMAIL_WORKER_HEARTBEAT_SECONDS,4 * settings.MAIL_TIMEOUT_SECONDS)
+
+
+def retry_delay(attempts:int) -> float:
+    """Exponential backoff with jitter, capped at EMAIL_RETRY_MAX_SECONDS"""
+    delay = settings.EMAIL_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    delay = min(delay,settings.EMAIL_RETRY_MAX_SECONDS)
+    return delay + random.uniform(0,delay / 10)
+
+
+class SMTPConnection:
+    """A long-lived SMTP session reused across sends, reconnecting on demand"""
+
+    def __init__(self):
+        self.client:"aiosmtplib.SMTP | None" = None
+
+    async def connect(self):
+        self.client = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME or None,
+            password=settings.MAIL_PASSWORD or None,
+            start_tls=settings.MAIL_STARTTLS,
+            timeout=settings.MAIL_TIMEOUT_SECONDS
+        )
+        await self.client.connect()
+
+    async def send(self,message):
+        with track_smtp_send():
+            if self.client is None or not self.client.is_connected:
+                await self.connect()
+
+            try:
+                await self.client.send_message(message)
+
+            except aiosmtplib.SMTPServerDisconnected:
+                #Idle connection dropped by the server, reconnect once
+                await self.connect()
+                await self.client.send_message(message)
+
+    async def close(self):
+        if self.client is not None and self.client.is_connected:
+            try:
+                await self.client.quit()
+            except aiosmtplib.SMTPException:
+                self.client.close()
+        self.client = None
+
+
+class EmailConsumer:
+    """
+    Moves jobs from the outbox into its own processing list, sends them over a
+    persistent connection and schedules failures for retry.
+    """
+
+    def __init__(self,name:str):
+        self.name = name
+        self.processing = processing_key(name)
+        self.smtp = SMTPConnection()
+        self.next_reclaim = 0.0
+        self.needs_recovery = False
+
+    async def recover(self,key:str | None = None):
+        #Jobs left in a processing list go back to the outbox
+        key = key or self.processing
+        while await redis_client.lmove(key,OUTBOX_KEY,"RIGHT","RIGHT"):
+            pass
+
+    async def heartbeat(self):
+        """Keep this consumer registered as alive"""
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.sadd(CONSUMERS_KEY,self.name)
+        pipe.set(heartbeat_key(self.name),int(time.time()),ex=heartbeat_ttl())
+        await pipe.execute()
+
+    async def keep_alive(self,stop:asyncio.Event):
+        #Runs beside the send loop, so a batch of slow sends never lets the heartbeat expire
+        while not stop.is_set():
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.warning(f"Email consumer {self.name} heartbeat failed: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(),timeout=heartbeat_ttl() / 3)
+            except asyncio.TimeoutError:
+                pass
+
+    async def reclaim_orphans(self):
+        #Consumers whose heartbeat expired died mid-batch, their jobs are requeued
+        for name in await redis_client.smembers(CONSUMERS_KEY):
+            if name == self.name or await redis_client.exists(heartbeat_key(name)):
+                continue
+            logger.warning(f"Requeueing jobs of expired email consumer {name}")
+            await self.recover(processing_key(name))
+            await redis_client.srem(CONSUMERS_KEY,name)
+
+    async def deregister(self):
+        await self.recover()
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.srem(CONSUMERS_KEY,self.name)
+        pipe.delete(heartbeat_key(self.name))
+        await pipe.execute()
+
+    async def promote_due_retries(self):
+        due = await redis_client.zrangebyscore(RETRY_KEY,"-inf",time.time(),start=0,num=100)
+        for raw in due:
+            #Only the consumer that removes the entry requeues it
+            if await redis_client.zrem(RETRY_KEY,raw):
+                await redis_client.lpush(OUTBOX_KEY,raw)
+
+    async def fetch_batch(self) -> list[str]:
+        first = await redis_client.blmove(OUTBOX_KEY,self.processing,1,"RIGHT","LEFT")
+        if first is None:
+            return []
+
+        pipe = redis_client.pipeline(transaction=False)
+        for _ in range(settings.EMAIL_BATCH_SIZE - 1):
+            pipe.lmove(OUTBOX_KEY,self.processing,"RIGHT","LEFT")
+        rest = await pipe.execute()
+        return [first] + [raw for raw in rest if raw is not None]
+
+    async def settle(self,raw:str,dead:str | None = None,retry:str | None = None,retry_at:float = 0):
+        """Drop the job from processing, adding it to the dead letter or retry set in the same transaction"""
+        pipe = redis_client.pipeline(transaction=True)
+        if dead is not None:
+            pipe.lpush(DEAD_KEY,dead)
+        if retry is not None:
+            pipe.zadd(RETRY_KEY,{retry:retry_at})
+        pipe.lrem(self.processing,1,raw)
+        await pipe.execute()
+
+    async def handle(self,raw:str):
+        try:
+            job = json.loads(raw)
+            message = build_email_message(job["recipient"],job["subject"],job["html"])
+            job["attempts"] = int(job.get("attempts",0))
+        except (ValueError,KeyError,TypeError) as e:
+            #A malformed job can never succeed, so it is not retried
+            logger.error(f"Unreadable email job moved to dead letter list: {e}")
+            await self.settle(raw,dead=raw)
+            return
+
+        try:
+            await self.smtp.send(message)
+
+        except Exception as e:
+            await self.smtp.close()
+            job["attempts"] += 1
+            logger.warning(f"Email {job.get('id')} to {job['recipient']} failed (attempt {job['attempts']}): {e}")
+
+            if job["attempts"] >= settings.EMAIL_MAX_ATTEMPTS:
+                logger.error(f"Email {job.get('id')} moved to dead letter list")
+                await self.settle(raw,dead=json.dumps(job))
+            else:
+                await self.settle(raw,retry=json.dumps(job),retry_at=time.time() + retry_delay(job["attempts"]))
+            return
+
+        await redis_client.lrem(self.processing,1,raw)
+
+    async def run(self,stop:asyncio.Event):
+        await self.recover()
+        await self.heartbeat()
+        keeper = asyncio.create_task(self.keep_alive(stop))
+        try:
+            while not stop.is_set():
+                try:
+                    if self.needs_recovery:
+                        await self.recover()
+                        self.needs_recovery = False
+                    if time.monotonic() >= self.next_reclaim:
+                        await self.reclaim_orphans()
+                        self.next_reclaim = time.monotonic() + heartbeat_ttl() / 3
+                    await self.promote_due_retries()
+                    batch = await self.fetch_batch()
+
+                except Exception as e:
+                    logger.error(f"Email consumer {self.name} error: {e}",exc_info=True)
+                    await asyncio.sleep(1)
+                    continue
+
+                for raw in batch:
+                    #One failing job must not strand the rest of the batch
+                    try:
+                        await self.handle(raw)
+                    except Exception as e:
+                        #Settling failed (e.g. Redis unavailable): the job stays in processing until recovered
+                        logger.error(f"Email consumer {self.name} could not settle a job: {e}",exc_info=True)
+                        self.needs_recovery = True
+        finally:
+            keeper.cancel()
+            await asyncio.gather(keeper,return_exceptions=True)
+            await self.smtp.close()
+            try:
+                await self.deregister()
+            except Exception as e:
+                logger.warning(f"Email consumer {self.name} left jobs for recovery: {e}")
+
+
+def consumer_prefix() -> str:
+    """Unique per process, so one worker's start-up never requeues another's in-flight jobs"""
+    return settings.EMAIL_WORKER_NAME or f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def run_email_workers(stop:asyncio.Event):
+    prefix = consumer_prefix()
+    consumers = [
+        EmailConsumer(f"{prefix}:{i}")
+        for i in range(settings.EMAIL_WORKER_CONCURRENCY)
+    ]
+    await asyncio.gather(*(consumer.run(stop) for consumer in consumers))
+
+
+#Run standalone: python -m utils.email_worker
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_email_workers(asyncio.Event()))
@@ -0,0 +1,122 @@
+import asyncio
+import concurrent.futures
+import logging
+from io import BytesIO
+from pathlib import Path
+from config import settings
+from utils.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+#Pillow is only needed inside the image worker processes
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+#Longest edge in pixels for each generated variant
+VARIANTS = {
+    "thumbnail": 200,
+    "card": 640,
+    "full": 1600,
+}
+
+FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+#concurrent.futures resolves ProcessPoolExecutor on first access, which is when
+#multiprocessing gets imported
+_pool: "concurrent.futures.ProcessPoolExecutor | None" = None
+
+
+class InvalidImageError(ValueError):
+    pass
+
+
+class ImageWorkerError(RuntimeError):
+    """The image pool broke again after being replaced, e.g. workers keep getting OOM-killed"""
+
+
+def get_image_pool() -> "concurrent.futures.ProcessPoolExecutor":
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _pool
+
+
+def reset_image_pool(pool:"concurrent.futures.ProcessPoolExecutor"):
+    """Drop a broken pool so the next upload starts a fresh one"""
+    global _pool
+    #A concurrent upload may already have replaced it
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_image_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def variant_mode(image, pil_format: str) -> str:
+    """RGB for JPEG; WebP keeps an alpha channel, including palette and LA transparency"""
+    if pil_format == "JPEG":
+        return "RGB"
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        return "RGBA"
+    return "RGB"
+
+
+def render_variants(path: str, image_format: str) -> dict[str, bytes]:
+    """
+    Decode, orient and downscale an image into every variant.
+    Runs inside a worker process, so it reads the upload from disk and only
+    returns plain bytes.
+    """
+    pil_format, _ = FORMATS[image_format]
+
+    #Pillow decodes lazily, so truncated or oversized images only fail once
+    #pixels are read: the whole pipeline is guarded, not just open()
+    try:
+        with Image.open(path) as source:
+            source.load()
+            image = ImageOps.exif_transpose(source)
+
+            mode = variant_mode(image, pil_format)
+            if image.mode != mode:
+                image = image.convert(mode)
+
+            variants = {}
+            for name, max_edge in VARIANTS.items():
+                variant = image.copy()
+                variant.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                buffer = BytesIO()
+                variant.save(buffer, pil_format, quality=settings.IMAGE_QUALITY, optimize=True)
+                variants[name] = buffer.getvalue()
+
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:  # OSError includes PIL.UnidentifiedImageError
+        raise InvalidImageError(str(e))
+
+    return variants
+
+
+async def process_image(path: Path) -> tuple[str, dict[str, bytes]]:
+    """Returns (file extension, variant bytes by name) for the image stored at `path`"""
+    loop = asyncio.get_running_loop()
+
+    #A worker that dies (OOM, segfault) breaks the whole pool and fails every job on it.
+    #Replace the pool and retry once: the job may only have shared the pool with the culprit.
+    for _ in range(2):
+        pool = get_image_pool()
+        try:
+            variants = await loop.run_in_executor(
+                pool, render_variants, str(path), settings.IMAGE_FORMAT
+            )
+            return FORMATS[settings.IMAGE_FORMAT][1], variants
+        except concurrent.futures.BrokenExecutor as e:  # BrokenProcessPool
+            logger.warning(f"Image worker pool broke, replacing it: {e}")
+            reset_image_pool(pool)
+
+    raise ImageWorkerError("Image workers crashed while processing the upload")
@@ -0,0 +1,158 @@
+import mimetypes
+import os
+from email.utils import formatdate,parsedate_to_datetime
+from pathlib import Path
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse,PlainTextResponse,Response
+from starlette.types import Receive,Scope,Send
+from config import settings
+from utils.media_store import OBJECTS_SUBDIR
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+#Sibling files produced by an offline compressor, in order of preference
+PRECOMPRESSED = (("br",".br"),("gzip",".gz"))
+
+
+def accepted_encodings(accept_encoding:str) -> dict[str,float]:
+    """Accept-Encoding as {coding: q}; a malformed q counts as 0"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding,*params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name,_,value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+    return weights
+
+
+class MediaFiles:
+    """
+    Serves the uploads tree.
+
+    - Content-addressed blobs (objects/...) get their sha256 as a strong ETag
+      and an immutable Cache-Control.
+    - If-None-Match / If-Modified-Since are answered with 304.
+    - Range and If-Range are handled by FileResponse, which uses the server's
+      zero-copy `http.response.pathsend` extension when it is available.
+    - With MEDIA_ACCEL_REDIRECT_PREFIX set, the body is left to the fronting
+      proxy through X-Accel-Redirect.
+    """
+
+    def __init__(self,directory:Path | str):
+        self.directory = Path(directory).resolve()
+
+    async def __call__(self,scope:Scope,receive:Receive,send:Send):
+        assert scope["type"] == "http"
+        response = await self.get_response(scope)
+        await response(scope,receive,send)
+
+    def resolve(self,scope:Scope) -> tuple[str,Path] | None:
+        path = scope["path"]
+        root_path = scope.get("root_path","")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        relative = path.lstrip("/")
+        full_path = (self.directory / relative).resolve()
+        if not full_path.is_relative_to(self.directory):
+            return None
+        return relative,full_path
+
+    def cache_headers(self,relative:str,stat_result:os.stat_result) -> dict[str,str]:
+        if relative.startswith(f"{OBJECTS_SUBDIR}/"):
+            etag = f'"{Path(relative).stem}"'
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+            cache_control = f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+        return {
+            "etag":etag,
+            "cache-control":cache_control,
+            "last-modified":formatdate(stat_result.st_mtime,usegmt=True),
+        }
+
+    def is_not_modified(self,request_headers:Headers,headers:dict[str,str],stat_result:os.stat_result) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or headers["etag"] in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError,ValueError):
+                return False
+        return False
+
+    async def precompressed(self,request_headers:Headers,full_path:Path) -> tuple[str,Path,os.stat_result] | None:
+        if "range" in request_headers:
+            return None
+
+        weights = accepted_encodings(request_headers.get("accept-encoding",""))
+        #Highest q first; on a tie PRECOMPRESSED order decides
+        candidates = sorted(
+            ((encoding,suffix) for encoding,suffix in PRECOMPRESSED if weights.get(encoding,weights.get("*",0)) > 0),
+            key=lambda candidate:-weights.get(candidate[0],weights.get("*",0)),
+        )
+        for encoding,suffix in candidates:
+            candidate = full_path.with_name(full_path.name + suffix)
+            try:
+                return encoding,candidate,await anyio.to_thread.run_sync(os.stat,candidate)
+            except FileNotFoundError:
+                continue
+        return None
+
+    async def get_response(self,scope:Scope) -> Response:
+        if scope["method"] not in ("GET","HEAD"):
+            return PlainTextResponse("Method Not Allowed",status_code=405,headers={"allow":"GET, HEAD"})
+
+        resolved = self.resolve(scope)
+        if resolved is None:
+            return PlainTextResponse("Not Found",status_code=404)
+        relative,full_path = resolved
+
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat,full_path)
+        except (FileNotFoundError,NotADirectoryError):
+            return PlainTextResponse("Not Found",status_code=404)
+
+        if not full_path.is_file():
+            return PlainTextResponse("Not Found",status_code=404)
+
+        request_headers = Headers(scope=scope)
+        headers = self.cache_headers(relative,stat_result)
+        media_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+
+        if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+            if self.is_not_modified(request_headers,headers,stat_result):
+                return Response(status_code=304,headers=headers)
+            headers["x-accel-redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{relative}"
+            return Response(status_code=200,headers=headers,media_type=media_type)
+
+        #Each representation has its own ETag, so the representation is picked
+        #before If-None-Match is compared
+        body_path,body_stat = full_path,stat_result
+        compressed = await self.precompressed(request_headers,full_path)
+        if compressed:
+            encoding,body_path,body_stat = compressed
+            headers["etag"] = f'{headers["etag"][:-1]}-{encoding}"'
+            headers["content-encoding"] = encoding
+            headers["vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(request_headers,headers,stat_result):
+            headers.pop("content-encoding",None)
+            return Response(status_code=304,headers=headers)
+
+        return FileResponse(body_path,stat_result=body_stat,headers=headers,media_type=media_type)
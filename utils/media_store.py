@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import Counter
+from datetime import datetime,timedelta
+from pathlib import Path
+from uuid import uuid4
+import aiofiles
+from sqlalchemy import bindparam,delete,func,select,update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models.models import MediaObject
+
+logger = logging.getLogger(__name__)
+
+OBJECTS_SUBDIR = "objects"
+CHUNK_SIZE = 1024 * 1024
+
+
+#objects/ab/cd/<sha256><ext>
+def object_relative_path(digest:str,ext:str) -> str:
+    return f"{OBJECTS_SUBDIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def object_url(digest:str,ext:str) -> str:
+    return f"/{settings.MEDIA_URL.strip('/')}/{object_relative_path(digest,ext)}"
+
+
+def url_to_path(url:str) -> Path:
+    return settings.MEDIA_ROOT / url[len(settings.MEDIA_URL):].lstrip("/")
+
+
+def _commit_temp_file(temp_path:Path,final_path:Path):
+    """Move a fully written temp file into place unless the blob already exists"""
+    if final_path.exists():
+        temp_path.unlink(missing_ok=True)
+        return
+    final_path.parent.mkdir(parents=True,exist_ok=True)
+    os.replace(temp_path,final_path)
+
+
+def _temp_path() -> Path:
+    temp_dir = settings.MEDIA_ROOT / OBJECTS_SUBDIR / "tmp"
+    temp_dir.mkdir(parents=True,exist_ok=True)
+    return temp_dir / uuid4().hex
+
+
+async def stream_to_temp(file,limit:int | None = None) -> tuple[Path,str,int]:
+    """
+    Copy an upload to a temp file chunk by chunk while hashing it.
+    Returns (temp path, sha256, size). With `limit`, reading stops as soon as
+    the upload is known to be larger, so callers can reject it on size > limit.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    temp_path = _temp_path()
+
+    async with aiofiles.open(temp_path,"wb") as out_file:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+            if limit is not None and size > limit:
+                break
+            await out_file.write(chunk)
+
+    return temp_path,hasher.hexdigest(),size
+
+
+#The reference is always taken before checking whether the blob exists: the
+#row lock it holds until the caller commits keeps collect_garbage off the blob
+async def write_object(db:AsyncSession,content:bytes,ext:str) -> tuple[str,str,int]:
+    """Store bytes under their content hash and reference them. Returns (digest, url, size)"""
+    digest = hashlib.sha256(content).hexdigest()
+    url = object_url(digest,ext)
+    await acquire_references(db,[url],{url:len(content)})
+
+    final_path = settings.MEDIA_ROOT / object_relative_path(digest,ext)
+    if not final_path.exists():
+        temp_path = _temp_path()
+        async with aiofiles.open(temp_path,"wb") as out_file:
+            await out_file.write(content)
+        _commit_temp_file(temp_path,final_path)
+
+    return digest,url,len(content)
+
+
+async def write_object_stream(db:AsyncSession,file,ext:str) -> tuple[str,str,int]:
+    """
+    Stream an upload to a temp file while hashing it, reference it and move it
+    to its content-addressed location. Duplicate uploads are discarded.
+    """
+    temp_path,digest,size = await stream_to_temp(file)
+    try:
+        url = object_url(digest,ext)
+        await acquire_references(db,[url],{url:size})
+        _commit_temp_file(temp_path,settings.MEDIA_ROOT / object_relative_path(digest,ext))
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return digest,url,size
+
+
+def _counted(urls) -> Counter:
+    return Counter(url for url in urls if url and url.startswith(f"/{settings.MEDIA_URL.strip('/')}/{OBJECTS_SUBDIR}/"))
+
+
+async def acquire_references(db:AsyncSession,urls,sizes:dict[str,int] | None = None):
+    """Increment reference counts, creating media_objects rows as needed"""
+    counts = _counted(urls)
+    if not counts:
+        return
+
+    rows = []
+    for url,count in counts.items():
+        path = url_to_path(url)
+        rows.append({
+            "key":path.name,
+            "hash":path.stem,
+            "url":url,
+            "size":sizes[url] if sizes and url in sizes else (path.stat().st_size if path.exists() else 0),
+            "ref_count":count,
+            "updated_at":datetime.utcnow()
+        })
+        
+    stmt = insert(MediaObject).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MediaObject.key],
+        set_={
+            "ref_count":MediaObject.ref_count + stmt.excluded.ref_count,
+            "updated_at":stmt.excluded.updated_at
+        }
+    )
+    await db.execute(stmt)
+
+
+async def release_references(db:AsyncSession,urls):
+    """Decrement reference counts; blobs are removed later by the collector"""
+    counts = _counted(urls)
+    if not counts:
+        return
+
+    table = MediaObject.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.key == bindparam("object_key"))
+        .values(ref_count=func.greatest(table.c.ref_count - bindparam("released"),0),updated_at=datetime.utcnow()),
+        [{"object_key":Path(url).name,"released":count} for url,count in counts.items()]
+    )
+
+
+def image_urls(entity) -> list[str]:
+    """All media URLs referenced by an entity with image_url/image_variants"""
+    urls = list((entity.image_variants or {}).values())
+    if entity.image_url and entity.image_url not in urls:
+        urls.append(entity.image_url)
+    return urls
+
+
+async def collect_garbage(db:AsyncSession) -> int:
+    """
+    Delete blobs that have had no references for MEDIA_GC_GRACE_SECONDS.
+    Candidate rows are locked with SKIP LOCKED, so rows a writer is referencing
+    are skipped, and a writer reaching a locked row waits until its blob and row
+    are gone and then stores the blob again.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS)
+    removed = 0
+
+    while True:
+        result = await db.execute(
+            select(MediaObject.key,MediaObject.url)
+            .where(MediaObject.ref_count <= 0,MediaObject.updated_at < cutoff)
+            .limit(settings.MEDIA_GC_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.all()
+        if not rows:
+            await db.commit()
+            return removed
+
+        for row in rows:
+            url_to_path(row.url).unlink(missing_ok=True)
+        await db.execute(delete(MediaObject).where(MediaObject.key.in_([row.key for row in rows])))
+        await db.commit()
+        removed += len(rows)
+
+
+async def run_media_gc(session_factory,stop:asyncio.Event):
+    while not stop.is_set():
+        try:
+            async with session_factory() as db:
+                removed = await collect_garbage(db)
+            if removed:
+                logger.info(f"Media GC removed {removed} unreferenced blobs")
+        except Exception as e:
+            logger.error(f"Media GC failed: {e}",exc_info=True)
+
+        try:
+            await asyncio.wait_for(stop.wait(),timeout=settings.MEDIA_GC_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
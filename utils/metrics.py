@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from starlette.responses import Response
+from starlette.types import ASGIApp,Message,Receive,Scope,Send
+from config import settings
+from utils.lazy import lazy_import
+
+#prometheus_client drags in http.server, wsgiref and urllib (~25 ms of import time)
+prometheus_client = lazy_import("prometheus_client")
+_create_lock = threading.Lock()
+
+
+class LazyMetric:
+    """A prometheus_client metric that is only created on first use"""
+
+    def __init__(self,kind:str,*args,**kwargs):
+        self.kind = kind
+        self.args = args
+        self.kwargs = kwargs
+        self.metric = None
+
+    def __getattr__(self,name:str):
+        if self.metric is None:
+            #Registering the same name twice raises, so creation is serialized
+            with _create_lock:
+                if self.metric is None:
+                    self.metric = getattr(prometheus_client,self.kind)(*self.args,**self.kwargs)
+        value = getattr(self.metric,name)
+        #Later lookups (labels, inc, observe) hit the instance dict directly
+        setattr(self,name,value)
+        return value
+
+
+#HTTP
+REQUEST_LATENCY = LazyMetric(
+    "Histogram","http_request_duration_seconds","Request latency by route",
+    ["method","route","status"],
+)
+REQUESTS_IN_PROGRESS = LazyMetric(
+    "Gauge","http_requests_in_progress","Requests currently being handled",
+    ["method"],multiprocess_mode="livesum",
+)
+
+#Database pool
+DB_POOL_CHECKOUTS = LazyMetric("Counter","db_pool_checkouts_total","Connections checked out of the pool",["pool"])
+DB_POOL_CONNECTS = LazyMetric("Counter","db_pool_connections_created_total","New DB connections opened",["pool"])
+DB_POOL_TIMEOUTS = LazyMetric("Counter","db_pool_timeouts_total","Checkouts that timed out waiting for a connection")
+
+#Redis
+REDIS_COMMAND_LATENCY = LazyMetric(
+    "Histogram","redis_command_duration_seconds","Redis command latency",
+    ["command"],buckets=(0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,1),
+)
+REDIS_COMMAND_ERRORS = LazyMetric("Counter","redis_command_errors_total","Failed Redis commands",["command"])
+
+#SMTP
+SMTP_SEND_LATENCY = LazyMetric("Histogram","smtp_send_duration_seconds","Time to hand one message to the SMTP server")
+SMTP_SEND_FAILURES = LazyMetric("Counter","smtp_send_failures_total","SMTP sends that raised")
+
+#Rate limiting
+RATE_LIMIT_REJECTIONS = LazyMetric("Counter","rate_limit_rejections_total","Requests rejected by the rate limiter",["route","scope"])
+
+#Uploads
+UPLOAD_BYTES = LazyMetric(
+    "Histogram","upload_bytes","Size of uploaded files",
+    ["kind"],buckets=(16e3,64e3,256e3,1e6,4e6,16e6,64e6),
+)
+UPLOAD_DURATION = LazyMetric("Histogram","upload_duration_seconds","Time to store an upload",["kind"])
+
+
+@contextmanager
+def track_smtp_send():
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SMTP_SEND_FAILURES.inc()
+        raise
+    finally:
+        SMTP_SEND_LATENCY.observe(time.perf_counter() - started)
+
+
+@contextmanager
+def track_upload(kind:str):
+    """Times an upload; the caller reports the stored size through the yielded callback"""
+    started = time.perf_counter()
+    yield UPLOAD_BYTES.labels(kind).observe
+    UPLOAD_DURATION.labels(kind).observe(time.perf_counter() - started)
+
+
+class PoolCollector:
+    """Reads pool occupancy at scrape time instead of tracking it on every checkout"""
+
+    def __init__(self,engines:dict):
+        self.engines = engines
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+        size = GaugeMetricFamily("db_pool_size","Configured pool size",labels=["pool"])
+        checked_out = GaugeMetricFamily("db_pool_checked_out","Connections in use",labels=["pool"])
+        checked_in = GaugeMetricFamily("db_pool_checked_in","Idle connections",labels=["pool"])
+        overflow = GaugeMetricFamily("db_pool_overflow","Connections above pool_size",labels=["pool"])
+
+        for name,engine in self.engines.items():
+            pool = engine.sync_engine.pool
+            size.add_metric([name],pool.size())
+            checked_out.add_metric([name],pool.checkedout())
+            checked_in.add_metric([name],pool.checkedin())
+            overflow.add_metric([name],max(pool.overflow(),0))
+
+        yield from (size,checked_out,checked_in,overflow)
+
+
+class HashPoolCollector:
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily,GaugeMetricFamily
+        from utils.security import get_hash_pool_metrics
+        for key,value in get_hash_pool_metrics().items():
+            family = CounterMetricFamily if key in ("completed","rejected") else GaugeMetricFamily
+            yield family(f"password_hash_pool_{key}",f"argon2 pool {key}",value=value)
+
+
+#Collectors that read this process's state at scrape time. Multiprocess mode
+#cannot aggregate them, so the scraped values are those of the answering worker.
+_process_collectors:list = []
+#Added to the default registry on the first scrape, so registering stays import-free
+_unregistered:list = []
+
+
+def register_process_collector(collector):
+    _process_collectors.append(collector)
+    _unregistered.append(collector)
+
+
+def instrument_pools(engines:dict):
+    for name,engine in engines.items():
+        pool = engine.sync_engine.pool
+        event.listen(pool,"checkout",lambda *args,pool_name=name: DB_POOL_CHECKOUTS.labels(pool_name).inc())
+        event.listen(pool,"connect",lambda *args,pool_name=name: DB_POOL_CONNECTS.labels(pool_name).inc())
+    register_process_collector(PoolCollector(engines))
+
+
+def route_label(scope:Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope["path"].startswith(settings.MEDIA_URL):
+        return f"{settings.MEDIA_URL}/*"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self,app:ASGIApp):
+        self.app = app
+
+    async def __call__(self,scope:Scope,receive:Receive,send:Send):
+        if scope["type"] != "http":
+            await self.app(scope,receive,send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+
+        async def send_wrapper(message:Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope,receive,send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            REQUEST_LATENCY.labels(method,route_label(scope),str(status_code)).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    #With several workers,PROMETHEUS_MULTIPROC_DIR aggregates their samples
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _process_collectors:
+            registry.register(collector)
+    else:
+        registry = prometheus_client.REGISTRY
+        while _unregistered:
+            registry.register(_unregistered.pop())
+    return Response(prometheus_client.generate_latest(registry),media_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,110 @@
+import hashlib
+from enum import Enum
+from config import settings
+from utils.redis import redis_client
+from utils.security import generate_secure_token
+
+#Codes and tokens are stored as sha256 digests, never in clear.
+#
+#otp:{email}          hash {code, attempts}, expires after OTP_TTL_SECONDS
+#otp_lock:{email}     set after OTP_MAX_ATTEMPTS wrong guesses, blocks issue and verify
+#reset_token:{email}  digest of the reset token issued by a successful verify
+
+ISSUE_OTP_LUA = """
+local lock_ttl = redis.call('TTL', KEYS[2])
+if lock_ttl > 0 then
+    return lock_ttl
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 0
+"""
+
+#Returns {state, n}: {'ok', 0}, {'invalid', attempts left} or {'locked', seconds}
+VERIFY_OTP_LUA = """
+local lock_ttl = redis.call('TTL', KEYS[2])
+if lock_ttl > 0 then
+    return {'locked', lock_ttl}
+end
+
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return {'invalid', 0}
+end
+
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[3], ARGV[4], 'EX', ARGV[5])
+    return {'ok', 0}
+end
+
+local max_attempts = tonumber(ARGV[2])
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts >= max_attempts then
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[2], 1, 'EX', ARGV[3])
+    return {'locked', tonumber(ARGV[3])}
+end
+return {'invalid', max_attempts - attempts}
+"""
+
+#Compare-and-delete so a token can only ever be redeemed once
+CONSUME_TOKEN_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+issue_otp_script = redis_client.register_script(ISSUE_OTP_LUA)
+verify_otp_script = redis_client.register_script(VERIFY_OTP_LUA)
+consume_token_script = redis_client.register_script(CONSUME_TOKEN_LUA)
+
+
+class OTPState(str,Enum):
+    ok = "ok"
+    invalid = "invalid"
+    locked = "locked"
+
+
+def digest(value:str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def otp_keys(email:str) -> list[str]:
+    email = email.strip().lower()
+    return [f"otp:{email}",f"otp_lock:{email}",f"reset_token:{email}"]
+
+
+async def issue_otp(email:str,otp:str) -> int:
+    """Store a fresh OTP, resetting the attempt count. Returns the remaining lockout in seconds, 0 if issued."""
+    otp_key,lock_key,_ = otp_keys(email)
+    return await issue_otp_script(keys=[otp_key,lock_key],args=[digest(otp),settings.OTP_TTL_SECONDS])
+
+
+async def verify_otp(email:str,otp:str) -> tuple[OTPState,int,str | None]:
+    """
+    Check and consume the OTP in one round trip. On success the reset token is
+    stored in the same script and returned: (ok, 0, token). Otherwise
+    (invalid, attempts left, None) or (locked, seconds, None).
+    """
+    reset_token = generate_secure_token()
+    state,value = await verify_otp_script(
+        keys=otp_keys(email),
+        args=[
+            digest(otp),
+            settings.OTP_MAX_ATTEMPTS,
+            settings.OTP_LOCKOUT_SECONDS,
+            digest(reset_token),
+            settings.RESET_TOKEN_TTL_SECONDS,
+        ]
+    )
+    state = OTPState(state)
+    return state,int(value),reset_token if state == OTPState.ok else None
+
+
+async def consume_reset_token(email:str,token:str) -> bool:
+    _,_,token_key = otp_keys(email)
+    return bool(await consume_token_script(keys=[token_key],args=[digest(token)]))
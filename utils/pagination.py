@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+from fastapi import HTTPException,status
+from sqlalchemy import Select,tuple_
+
+
+#Encode the last row of a page into an opaque cursor
+def encode_cursor(created_at:datetime,row_id:UUID) -> str:
+    payload = json.dumps({"c":created_at.isoformat(),"i":str(row_id)},separators=(",",":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+#Decode a cursor back into (created_at, id)
+def decode_cursor(cursor:str) -> tuple[datetime,UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]),UUID(payload["i"])
+
+    except (binascii.Error,ValueError,KeyError,TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+#Apply keyset ordering and filtering to a query
+def apply_keyset(query:Select,model,cursor:str | None,limit:int) -> Select:
+    """
+    Order by (created_at DESC, id DESC) and continue after `cursor`.
+    An empty cursor means the first page. One extra row is fetched
+    so that paginate_rows can tell whether another page exists.
+    """
+    if cursor:
+        created_at,row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at,model.id) < tuple_(created_at,row_id))
+
+    return query.order_by(model.created_at.desc(),model.id.desc()).limit(limit + 1)
+
+
+#Split a keyset result into the page and the next cursor
+def paginate_rows(rows:list,limit:int) -> tuple[list,str | None]:
+    if len(rows) <= limit:
+        return rows,None
+
+    page = rows[:limit]
+    last = page[-1]
+    return page,encode_cursor(last.created_at,last.id)
+
+
+#Cursor for ranked results: (rank, id)
+def encode_rank_cursor(rank:float,row_id:UUID) -> str:
+    payload = json.dumps({"r":rank,"i":str(row_id)},separators=(",",":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor:str) -> tuple[float,UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(payload["r"]),UUID(payload["i"])
+
+    except (binascii.Error,ValueError,KeyError,TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from uuid import UUID
+from redis.exceptions import RedisError
+from config import settings
+from schemas.auth_schemas import UserPrincipal
+from utils.redis import redis_client,delete_many,get_many
+
+logger = logging.getLogger(__name__)
+
+#In-process LRU: user_id -> (principal, version, expires_at)
+_local:OrderedDict[str,tuple[UserPrincipal,str,float]] = OrderedDict()
+
+
+#Write the principal only if the version read before the DB load is still current,
+#so a bump that lands while the user row is being read is never overwritten
+CACHE_PRINCIPAL_LUA = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[2])
+return 1
+"""
+
+cache_principal_script = redis_client.register_script(CACHE_PRINCIPAL_LUA)
+
+
+def version_key(user_id) -> str:
+    return f"auth:user_version:{user_id}"
+
+
+def principal_key(user_id) -> str:
+    return f"auth:principal:{user_id}"
+
+
+def _remember(principal:UserPrincipal,version:str):
+    key = str(principal.id)
+    _local[key] = (principal,version,time.monotonic() + settings.AUTH_LOCAL_CACHE_TTL)
+    _local.move_to_end(key)
+    while len(_local) > settings.AUTH_LOCAL_CACHE_SIZE:
+        _local.popitem(last=False)
+
+
+async def get_cached_principal(user_id:UUID) -> tuple[UserPrincipal | None,str | None]:
+    """
+    Look the principal up in the local LRU first, then in Redis.
+    A Redis entry is only trusted when its version matches the user's counter.
+    On a miss the current version is returned too: pass it to cache_principal
+    after loading the user. It is None when Redis could not be read.
+    """
+    key = str(user_id)
+    entry = _local.get(key)
+    if entry and entry[2] > time.monotonic():
+        _local.move_to_end(key)
+        return entry[0],entry[1]
+
+    try:
+        version,payload = await get_many([version_key(user_id),principal_key(user_id)])
+    except RedisError as e:
+        logger.warning(f"Principal cache read failed for {user_id}: {e}")
+        return None,None
+
+    version = version or "0"
+    if not payload:
+        return None,version
+
+    data = json.loads(payload)
+    if data.pop("version") != version:
+        return None,version
+
+    principal = UserPrincipal.model_validate(data)
+    _remember(principal,version)
+    return principal,version
+
+
+async def cache_principal(principal:UserPrincipal,version:str) -> bool:
+    """Store a principal loaded after reading `version`; skipped if the user was bumped since"""
+    payload = principal.model_dump(mode="json")
+    payload["version"] = version
+    try:
+        stored = await cache_principal_script(
+            keys=[version_key(principal.id),principal_key(principal.id)],
+            args=[version,settings.AUTH_CACHE_TTL,json.dumps(payload)]
+        )
+    except RedisError as e:
+        logger.warning(f"Principal cache write failed for {principal.id}: {e}")
+        return False
+
+    if stored:
+        _remember(principal,version)
+    return bool(stored)
+
+
+async def bump_user_version(user_id:UUID):
+    """
+    Invalidate every cached principal for this user.
+    Other workers drop their local copy within AUTH_LOCAL_CACHE_TTL seconds.
+    """
+    _local.pop(str(user_id),None)
+    try:
+        #The bump alone makes cached copies unusable; the delete frees them
+        await redis_client.incr(version_key(user_id))
+        await delete_many([principal_key(user_id)])
+    except RedisError as e:
+        logger.warning(f"Principal cache invalidation failed for {user_id}: {e}")
@@ -0,0 +1,168 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable
+from weakref import WeakKeyDictionary
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp,Message,Receive,Scope,Send
+from config import settings
+
+logger = logging.getLogger("sql.profile")
+
+_PARAMS = re.compile(r"\$\d+|%\(\w+\)s|\?|:\w+")
+_PARAM_LISTS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_NUMBERS = re.compile(r"\b\d+\b")
+
+
+def statement_shape(statement:str) -> str:
+    """Strip parameters and literals so repeated queries compare equal"""
+    shape = _PARAMS.sub("?",statement)
+    shape = _NUMBERS.sub("?",shape)
+    shape = _PARAM_LISTS.sub("(?)",shape)
+    return " ".join(shape.split())
+
+
+class RequestProfile:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement:str | None = None
+        self.shapes:Counter = Counter()
+
+    def record(self,statement:str,elapsed_ms:float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def repeated_shapes(self) -> list[tuple[str,int]]:
+        return [
+            (shape,count) for shape,count in self.shapes.most_common()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+
+current_profile:ContextVar[RequestProfile | None] = ContextVar("current_profile",default=None)
+
+
+#(statement, elapsed_ms), called once per executed statement, failed ones included
+StatementObserver = Callable[[str,float],None]
+
+#One pair of engine listeners feeds every observer (profiling, query counting)
+_observers:WeakKeyDictionary[Engine,list[StatementObserver]] = WeakKeyDictionary()
+
+
+def _notify(engine:Engine,statement:str,started:float):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for observer in tuple(_observers.get(engine,())):
+        observer(statement,elapsed_ms)
+
+
+def _before_cursor_execute(conn,cursor,statement,parameters,context,executemany):
+    #Kept on the execution context, so a failed statement leaves nothing behind on the connection
+    context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn,cursor,statement,parameters,context,executemany):
+    _notify(conn.engine,statement,context.query_start)
+
+
+def _handle_error(exception_context):
+    started = getattr(exception_context.execution_context,"query_start",None)
+    if started is not None:
+        _notify(exception_context.engine,exception_context.statement,started)
+
+
+def observe_statements(engine,observer:StatementObserver):
+    """Call `observer` for every statement executed on an async engine"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine,"before_cursor_execute",_before_cursor_execute):
+        event.listen(sync_engine,"before_cursor_execute",_before_cursor_execute)
+        event.listen(sync_engine,"after_cursor_execute",_after_cursor_execute)
+        event.listen(sync_engine,"handle_error",_handle_error)
+    _observers.setdefault(sync_engine,[]).append(observer)
+
+
+def stop_observing(engine,observer:StatementObserver):
+    _observers[engine.sync_engine].remove(observer)
+
+
+def _profile_statement(statement:str,elapsed_ms:float):
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        logger.warning(json.dumps({"event":"slow_query","ms":round(elapsed_ms,2),"statement":statement}))
+
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement,elapsed_ms)
+
+
+def instrument_engine(engine):
+    """Log slow statements and feed the per-request profile"""
+    observe_statements(engine,_profile_statement)
+
+
+class SQLProfilerMiddleware:
+    """
+    Records statement count, total DB time and the slowest statement per request.
+    Emits them as Server-Timing and a structured log line, and warns when one
+    statement shape repeats N_PLUS_ONE_THRESHOLD times or more.
+    """
+
+    def __init__(self,app:ASGIApp):
+        self.app = app
+
+    async def __call__(self,scope:Scope,receive:Receive,send:Send):
+        if scope["type"] != "http":
+            await self.app(scope,receive,send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message:Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={profile.total_ms:.2f};desc="{profile.count} queries", '
+                    f"db-slowest;dur={profile.slowest_ms:.2f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope,receive,send_wrapper)
+        finally:
+            current_profile.reset(token)
+            self.log(scope,status_code,profile,(time.perf_counter() - started) * 1000)
+
+    def log(self,scope:Scope,status_code:int,profile:RequestProfile,elapsed_ms:float):
+        line = {
+            "event":"request_sql",
+            "method":scope["method"],
+            "path":scope["path"],
+            "status":status_code,
+            "ms":round(elapsed_ms,2),
+            "queries":profile.count,
+            "db_ms":round(profile.total_ms,2),
+            "slowest_ms":round(profile.slowest_ms,2),
+            "slowest_statement":profile.slowest_statement,
+        }
+
+        repeated = profile.repeated_shapes()
+        if repeated:
+            line["n_plus_one"] = [{"statement":shape,"count":count} for shape,count in repeated]
+            logger.warning(json.dumps(line))
+        else:
+            logger.info(json.dumps(line))
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import AsyncEngine
+from utils.profiling import observe_statements,stop_observing
+
+
+class QueryCounter:
+    """Collects the SQL statements executed on an engine while active"""
+
+    def __init__(self):
+        self.statements:list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self,statement:str,elapsed_ms:float):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine:AsyncEngine):
+    """
+    Count statements issued against `engine`, e.g. to pin the cost of an endpoint:
+
+        with count_queries(engine) as counter:
+            await client.post("/tags/", json=...)
+        assert counter.count == 2
+    """
+    counter = QueryCounter()
+    observe_statements(engine,counter)
+    try:
+        yield counter
+    finally:
+        stop_observing(engine,counter)
@@ -0,0 +1,106 @@
+import logging
+import math
+from fastapi import HTTPException,Request,status
+from redis.exceptions import RedisError
+from config import settings
+from utils.redis import redis_client
+from utils.metrics import RATE_LIMIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+#Token buckets checked and consumed atomically. KEYS are bucket keys, ARGV holds
+#(capacity, refill window in ms) per key. Tokens are only taken when every bucket
+#has one. Returns {0, 0} when allowed, else {retry after ms, 1-based index of the bucket}.
+TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local tokens = {}
+local retry, blocked = 0, 0
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local window = tonumber(ARGV[2 * i])
+    local rate = capacity / window
+    local state = redis.call('HMGET', KEYS[i], 't', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - updated) * rate)
+    tokens[i] = available
+    if available < 1 then
+        local wait = math.ceil((1 - available) / rate)
+        if wait > retry then
+            retry, blocked = wait, i
+        end
+    end
+end
+
+if retry > 0 then
+    return {retry, blocked}
+end
+
+for i = 1, #KEYS do
+    redis.call('HSET', KEYS[i], 't', tokens[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], ARGV[2 * i])
+end
+return {0, 0}
+"""
+
+token_bucket = redis_client.register_script(TOKEN_BUCKET_LUA)
+
+
+def parse_limit(limit:str) -> tuple[int,int]:
+    """"10/60" -> (10 requests, 60000 ms)"""
+    count,seconds = limit.split("/")
+    return int(count),int(float(seconds) * 1000)
+
+
+def client_ip(request:Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def check_rate_limit(request:Request,route:str,email:str | None = None):
+    """
+    Enforce the RATE_LIMITS[route] buckets (per IP, per email and global) in
+    one Redis round trip. Call it first in a handler, before any DB or hashing
+    work. Raises 429 with Retry-After; fails open if Redis is unavailable.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    limits = settings.RATE_LIMITS.get(route,{})
+    subjects = {
+        "ip":client_ip(request),
+        "email":email.strip().lower() if email else None,
+        "global":"all",
+    }
+
+    scopes,keys,args = [],[],[]
+    for scope,limit in limits.items():
+        subject = subjects.get(scope)
+        if not subject:
+            continue
+        capacity,window_ms = parse_limit(limit)
+        scopes.append(scope)
+        keys.append(f"ratelimit:{route}:{scope}:{subject}")
+        args.extend((capacity,window_ms))
+
+    if not keys:
+        return
+
+    try:
+        retry_ms,blocked = await token_bucket(keys=keys,args=args)
+    except RedisError as e:
+        logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+        return
+
+    if retry_ms:
+        RATE_LIMIT_REJECTIONS.labels(route,scopes[blocked - 1]).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After":str(max(1,math.ceil(retry_ms / 1000)))}
+        )
@@ -1,16 +1,105 @@
+import time
+from typing import Iterable,Mapping
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
 from config import settings
+from utils.metrics import REDIS_COMMAND_ERRORS,REDIS_COMMAND_LATENCY
 
 
-redis_client = redis.from_url(settings.REDIS_URL,decode_responses = True)
+def _observe(command:str,started:float,failed:bool):
+    if failed:
+        REDIS_COMMAND_ERRORS.labels(command).inc()
+    REDIS_COMMAND_LATENCY.labels(command).observe(time.perf_counter() - started)
+
+
+class InstrumentedPipeline(Pipeline):
+    """A pipeline is timed as a single PIPELINE command"""
+
+    async def execute(self,raise_on_error:bool = True):
+        started,failed = time.perf_counter(),False
+        try:
+            return await super().execute(raise_on_error)
+        except redis.RedisError:
+            failed = True
+            raise
+        finally:
+            _observe("PIPELINE",started,failed)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Records latency and failures per command"""
+
+    async def execute_command(self,*args,**options):
+        command = str(args[0]).upper()
+        started,failed = time.perf_counter(),False
+        try:
+            return await super().execute_command(*args,**options)
+        except redis.RedisError:
+            failed = True
+            raise
+        finally:
+            _observe(command,started,failed)
+
+    def pipeline(self,transaction:bool = True,shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool,self.response_callbacks,transaction,shard_hint)
+
+
+#Callers wait up to REDIS_POOL_TIMEOUT for a free connection instead of failing at once
+redis_pool = redis.BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections = settings.REDIS_MAX_CONNECTIONS,
+    timeout = settings.REDIS_POOL_TIMEOUT,
+    socket_timeout = settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout = settings.REDIS_CONNECT_TIMEOUT,
+    socket_keepalive = True,
+    health_check_interval = settings.REDIS_HEALTH_CHECK_INTERVAL,
+    retry_on_timeout = settings.REDIS_RETRY_ON_TIMEOUT,
+    decode_responses = True
+)
+
+redis_client = InstrumentedRedis(connection_pool = redis_pool)
+
+
+async def ping_redis():
+    """Fail fast at startup when Redis is unreachable"""
+    await redis_client.ping()
+
+
+async def close_redis():
+    await redis_client.aclose()
+    await redis_pool.disconnect()
+
 
 async def store_in_redis(key:str, value:str,ttl:int):
     await redis_client.setex(key,ttl,value)
-    
+
 async def get_from_redis(key:str):
     return await redis_client.get(key)
 
 async def delete_from_redis(key:str):
     await redis_client.delete(key)
-    
-    
\ No newline at end of file
+
+
+#Batch helpers: one round trip regardless of the number of keys
+async def get_many(keys:Iterable[str]) -> list:
+    keys = list(keys)
+    if not keys:
+        return []
+    return await redis_client.mget(keys)
+
+
+async def store_many(mapping:Mapping[str,str],ttl:int):
+    """MSET has no TTL, so SETEX calls are pipelined instead"""
+    if not mapping:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key,value in mapping.items():
+            pipe.setex(key,ttl,value)
+        await pipe.execute()
+
+
+async def delete_many(keys:Iterable[str]) -> int:
+    keys = list(keys)
+    if not keys:
+        return 0
+    return await redis_client.unlink(*keys)
@@ -1,14 +1,26 @@
 from passlib.context import CryptContext
 from datetime import datetime,timedelta
 from uuid import uuid4
-from typing import Dict,Any,Optional
-from jose import jwt
+from typing import Dict,Any,Optional,Tuple
 from config import settings
-import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fastapi import HTTPException,status
+import asyncio
 import secrets
+from utils.lazy import lazy_import
+
+jwt = lazy_import("jose.jwt")
 
 pwd_context = CryptContext(schemes=["argon2"],deprecated = "auto")
 
+#Dedicated pool so argon2 never runs on the event loop
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="argon2"
+)
+hash_pool_stats = {"in_flight":0,"completed":0,"rejected":0}
+
 #function to hash plain password
 def hashed_password(plain_password:str) -> str:
     return pwd_context.hash(plain_password)
@@ -17,6 +29,58 @@ def hashed_password(plain_password:str) -> str:
 def verify_password(plain_password,hashed_password) -> bool:
     return pwd_context.verify(plain_password,hashed_password)
 
+
+async def run_in_hash_pool(func,*args):
+    """
+    Run a hashing call in the argon2 pool.
+    Rejects with 503 once workers and queue are full instead of piling up work.
+    """
+    capacity = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+    if hash_pool_stats["in_flight"] >= capacity:
+        hash_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After":"1"}
+        )
+
+    hash_pool_stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hash_executor,partial(func,*args))
+    finally:
+        hash_pool_stats["in_flight"] -= 1
+        hash_pool_stats["completed"] += 1
+
+
+def get_hash_pool_metrics() -> Dict[str,int]:
+    """Snapshot of the argon2 pool: busy workers, queued calls and rejections"""
+    in_flight = hash_pool_stats["in_flight"]
+    return {
+        "workers":settings.PASSWORD_HASH_WORKERS,
+        "busy":min(in_flight,settings.PASSWORD_HASH_WORKERS),
+        "queue_depth":max(0,in_flight - settings.PASSWORD_HASH_WORKERS),
+        "completed":hash_pool_stats["completed"],
+        "rejected":hash_pool_stats["rejected"],
+    }
+
+
+#Async variants used by request handlers
+async def hashed_password_async(plain_password:str) -> str:
+    return await run_in_hash_pool(pwd_context.hash,plain_password)
+
+
+async def verify_password_async(plain_password,hashed_password) -> bool:
+    return await run_in_hash_pool(pwd_context.verify,plain_password,hashed_password)
+
+
+async def verify_and_update_password_async(plain_password,hashed_password) -> Tuple[bool,Optional[str]]:
+    """
+    Verify and, when the stored hash uses outdated parameters, return a new hash
+    Returns (valid, new_hash_or_None)
+    """
+    return await run_in_hash_pool(pwd_context.verify_and_update,plain_password,hashed_password)
+
 #Create JWT Token
 def create_access_token(data:Dict[str,Any],expires_delta:Optional[timedelta] = None) -> str:
     """Generate a JWT access token with optional expiration"""
@@ -39,7 +103,7 @@ def create_access_token(data:Dict[str,Any],expires_delta:Optional[timedelta] = N
 
 #Function to generate random otp
 def generate_otp(length:int = 6) -> str:
-    return "".join(str(random.randint(0,9)) for _ in range(length))
+    return "".join(str(secrets.randbelow(10)) for _ in range(length))
 
 
 #Generate reset token
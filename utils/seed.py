@@ -2,13 +2,12 @@ from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.user_schemas import Roles, AccountStatusEnum
 from models.models import User
-from utils.security import hashed_password
+from utils.security import hashed_password_async
 from config import settings
 
 
 async def seed_admin(db:AsyncSession):
-    result = await db.execute(select(User).where(User.role == Roles.admin))
-    admin = result.scalars().first()
+    admin = await db.scalar(select(User.id).where(User.role == Roles.admin).limit(1))
     
     if admin:
         return
@@ -17,7 +16,7 @@ async def seed_admin(db:AsyncSession):
         username= settings.ADMIN_NAME,
         email= settings.ADMIN_EMAIL,
         phone = settings.PHONE_NUMBER,
-        hash_password = hashed_password(settings.ADMIN_PASSWORD),
+        hash_password = await hashed_password_async(settings.ADMIN_PASSWORD),
         role = Roles.admin,
         status = AccountStatusEnum.active,
         verified = True
@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Any,Iterable
+from pydantic import BaseModel,TypeAdapter
+from fastapi import Response
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema:type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter(list[schema]), built once per schema"""
+    return TypeAdapter(list[schema])
+
+
+def dump_list(schema:type[BaseModel],rows:Iterable[Any]) -> bytes:
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows,from_attributes=True))
+
+
+def list_response(schema:type[BaseModel],rows:Iterable[Any]) -> Response:
+    """
+    Validate ORM rows once and dump them straight to JSON bytes. Returning a
+    Response makes FastAPI skip its own response_model pass; keep response_model
+    on the route for the OpenAPI schema.
+    """
+    return Response(content=dump_list(schema,rows),media_type="application/json")
+
+
+def model_response(model:BaseModel) -> Response:
+    return Response(content=model.model_dump_json(),media_type="application/json")
@@ -1,50 +1,48 @@
-from pathlib import Path
-from uuid import uuid4
-import aiofiles
-from fastapi import UploadFile
+from fastapi import UploadFile,HTTPException,status
+from sqlalchemy.ext.asyncio import AsyncSession
 from config import settings
+from utils.images import process_image,InvalidImageError,ImageWorkerError
+from utils.media_store import stream_to_temp,write_object
+from utils.metrics import track_upload
 
 
-async def save_upload_files(
-    file:UploadFile,
-    subdir:str | None = None,
-    
-) -> str:
+async def save_image_upload(db:AsyncSession,file:UploadFile) -> tuple[str,dict[str,str],str]:
     """
-    Save an uploaded file to MEDIA_ROOT / subdir and return the URL path.
+    Stream an uploaded image to a temp file, generate size-bounded variants off
+    the event loop and write them into the content-addressed store.
+    The variants are referenced in the caller's transaction.
 
-    Returns something like: /uploads/subdir/uuid.ext
-    (You can store this directly in your DB.)
+    Returns (url of the full variant, {variant name: url}, sha256 of the original).
     """
-# 1) Create folder
-    upload_dir =settings.MEDIA_ROOT
-    if subdir:
-        upload_dir= upload_dir / subdir
-        
-    upload_dir.mkdir(parents=True,exist_ok=True)
+    with track_upload("image") as record_size:
+        temp_path,digest,size = await stream_to_temp(file,settings.MAX_IMAGE_UPLOAD_BYTES)
+        await file.close()
 
-#2)Generate safe unique filename
-    original_name =Path(file.filename or "")
-    ext = original_name.suffix.lower()
-    filename = f"{uuid4().hex}{ext}"
-    
-    file_path = upload_dir / filename
-    
-#3)Save files in chunks
-    async with aiofiles.open(file_path,"wb") as out_files:
-        while True:
-            chunk = await file.read(1024 * 1024)
-            if not chunk:
-                break
-            await out_files.write(chunk)
-            
-    await file.close()
+        try:
+            if size > settings.MAX_IMAGE_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Image is too large"
+                )
+            record_size(size)
 
-#4)Build Url path to store in DB
-    parts = [settings.MEDIA_URL.strip("/")]
-    if subdir:
-        parts.append(subdir.strip("/"))
-    parts.append(filename)
+            try:
+                ext,variants = await process_image(temp_path)
+            except InvalidImageError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid image file"
+                )
+            except ImageWorkerError:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Image processing is temporarily unavailable"
+                )
+        finally:
+            temp_path.unlink(missing_ok=True)
 
-    url_path = "/" + "/".join(parts)
-    return url_path
\ No newline at end of file
+        urls = {}
+        for name,content in variants.items():
+            _,urls[name],_ = await write_object(db,content,ext)
+
+    return urls["full"],urls,digest
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config import settings
+from utils.redis import redis_pool
+from utils.seed import seed_admin
+
+logger = logging.getLogger(__name__)
+
+#Arbitrary app-wide key for pg_try_advisory_xact_lock
+SEED_ADMIN_LOCK_KEY = 7243019
+
+#Default page size of GET /posts/public
+WARM_LISTING_LIMIT = 20
+
+
+async def warm_db_pool(engine:AsyncEngine,size:int):
+    """Open `size` connections at once so they are pooled before the first request"""
+    #Overflow connections are closed as soon as they are returned, so warming them is wasted
+    size = min(size,settings.DB_POOL_SIZE)
+    if size <= 0:
+        return
+    connections = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    try:
+        await asyncio.gather(*(connection.exec_driver_sql("SELECT 1") for connection in connections))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+
+async def warm_redis_pool(size:int):
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(await redis_pool.get_connection("PING"))
+    finally:
+        for connection in connections:
+            await redis_pool.release(connection)
+
+
+async def seed_admin_once(session_factory):
+    """
+    Only the worker holding the advisory lock seeds; the others skip instead of
+    racing on the same insert. The lock is released when the transaction ends.
+    """
+    async with session_factory() as db:
+        acquired = await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"),{"key":SEED_ADMIN_LOCK_KEY})
+        if not acquired:
+            logger.info("Admin seeding is running in another worker, skipping")
+            await db.rollback()
+            return
+        await seed_admin(db)
+        await db.commit()
+
+
+async def warm_caches():
+    """Fill the Redis entries behind the first public listing page, in both pagination modes"""
+    from crud.post_feed import get_feed_page
+    from utils.cache import listing_key,prime
+
+    loaders = {}
+    for cursor in (None,""):
+        async def load(db,cursor=cursor) -> str:
+            return await get_feed_page(db,0,WARM_LISTING_LIMIT,cursor)
+
+        loaders[await listing_key(0,WARM_LISTING_LIMIT,cursor)] = load
+    await prime(loaders)